@@ -1,9 +1,12 @@
+from src.catalog import CleanedDataCatalog, DEFAULT_CATALOG_PATH
 from src.config_loader import ConfigLoader
-from models.aggregate_model import ProphetModel  
-from models.item_model import XGBoostModel  # Import XGBoost model
-from src.data_cleaner import DataCleaner
+from src.accuracy import AccuracyTracker, DEFAULT_ACCURACY_CACHE, load_actuals
+from src.analysis_cubes import AnalysisCubes, DEFAULT_CUBES_PATH
+from src.forecast_store import DEFAULT_FORECAST_STORE, ForecastStore, new_run_id
+from src.pipeline import DEFAULT_PIPELINE_STATE_PATH, PipelineRunner, TaskStateStore
+from src.pipeline_tasks import build_tasks
+from utils.executors import make_executor
 from utils.logger import setup_logging
-import pandas as pd
 
 def main():
     # Set up logging
@@ -16,51 +19,45 @@ def main():
         config = config_loader.load_config()
         logger.info("Configuration loaded successfully.")
 
-        # Step 2: Data cleaning
-        logger.info("Starting data cleaning process...")
-        cleaner = DataCleaner()
-        for country in config['countries']:
-            logger.info(f"Cleaning data for {config['countries'][country]['name']}...")
-            raw_data_path = config['countries'][country]['data_path']
-            data = pd.read_excel(raw_data_path)  # Load raw data for cleaning
-            cleaned_data = cleaner.add_missing_dates(data)
-            cleaned_data = cleaner.add_national_column(cleaned_data, country=config['countries'][country]['name'])
-            cleaned_data = cleaner.set_data_types(cleaned_data)
-            cleaned_data = cleaner.backward_fill(cleaned_data)
-            cleaned_data = cleaner.normalize_column_names(cleaned_data)
-            cleaner.save_cleaned_data(cleaned_data, country=config['countries'][country]['name'])
-            logger.info(f"Data cleaned and saved for {config['countries'][country]['name']}.")
+        # Every forecast appended to the forecast store by this run is tagged with its id
+        config['run_id'] = new_run_id()
+        logger.info(f"Starting run {config['run_id']}.")
 
-        # Step 3: National-level forecasting with Prophet
-        logger.info("Starting national-level forecasting using Prophet...")
-        prophet_model = ProphetModel(config)
-        
-        for country in config['countries']:
-            logger.info(f"Processing forecasting for {config['countries'][country]['name']}...")
-            prophet_model.load_data(country=country)
-            prophet_model.preprocess_data()
-            prophet_model.fit()
-            prophet_model.forecast(country=country)
-            logger.info(f"National-level forecast completed for {config['countries'][country]['name']}.")
+        # Steps 2-4: Data cleaning, national-level and region-wise forecasting as one task per
+        # (stage, country). Tasks completed by a previous run with the same inputs are skipped,
+        # and a failing country only blocks its own later stages. Ready tasks are fanned out
+        # to the configured executor (threads, local processes or a Dask/Ray cluster).
+        pipeline_config = config.get('pipeline', {})
+        store = TaskStateStore(pipeline_config.get('state_path', DEFAULT_PIPELINE_STATE_PATH))
+        executor = make_executor(pipeline_config.get('executor', 'serial'), pipeline_config.get('max_workers'),
+                                 pipeline_config.get('address'))
+        try:
+            statuses = PipelineRunner(store, executor).run(build_tasks(config))
+        finally:
+            executor.shutdown()
 
-            # Step 4: Region-wise forecasting with XGBoost
-        logger.info("Starting region-wise forecasting using XGBoost...")
-        xgboost_model = XGBoostModel(config)
+        # Garbage-collect old cleaned snapshots
+        catalog_config = config.get('catalog', {})
+        CleanedDataCatalog(catalog_config.get('path', DEFAULT_CATALOG_PATH)).compact(
+            keep=catalog_config.get('keep_snapshots', 7))
 
-        for country in config['countries']:
-            logger.info(f"Loading cleaned data and national forecast for {config['countries'][country]['name']}...")
+        # Step 5: Evaluate stored forecasts against the actuals that arrived since the last run
+        store_config = config.get('forecast_store', {})
+        forecast_store = ForecastStore(store_config.get('path', DEFAULT_FORECAST_STORE),
+                                       config.get('forecast_quantiles', []))
+        tracker = AccuracyTracker(forecast_store, store_config.get('accuracy_path', DEFAULT_ACCURACY_CACHE))
+        actuals = load_actuals(config)
+        if tracker.update(actuals):
+            for row in tracker.report(by=['country', 'level', 'horizon']).itertuples(index=False):
+                logger.info(f"Accuracy of {row.level} forecasts for {row.country} at horizon {row.horizon}: "
+                            f"MAPE {row.mape:.4f}, WAPE {row.wape:.4f}, bias {row.bias:+.4f} ({row.n} forecasts)")
 
-            # Load the entire dataset for training and forecasting
-            X, y = xgboost_model.load_data(country=country)
-            
-            # Train XGBoost models for each region
-            xgboost_model.fit(X, y, country=country)
-            logger.info(f"XGBoost model training completed for {config['countries'][country]['name']}.")
+        # Step 6: Pre-aggregate the result-analysis cubes loaded by the notebooks and dashboards
+        AnalysisCubes(forecast_store, tracker, store_config.get('cubes_path', DEFAULT_CUBES_PATH)).build(actuals)
 
-            # Forecast for the next 12 periods
-            logger.info(f"Forecasting region-wise sales for {config['countries'][country]['name']}...")
-            xgboost_model.forecast(X, country=country)
-            logger.info(f"Region-wise forecasting completed for {config['countries'][country]['name']}.")
+        failed = ['/'.join(part for part in key if part) for key, status in statuses.items() if status == 'failed']
+        if failed:
+            raise RuntimeError(f"Pipeline tasks failed: {failed}. Rerun to resume them.")
 
         logger.info("Pipeline completed successfully.")
 
@@ -1,15 +1,20 @@
-from models.base_model import BaseModel, execution_time_logger
+from models.base_model import BaseModel, execution_time_logger, quantile_column
+from models.prophet_artifact import ProphetArtifact, ProphetSeriesModel
+from models.registry import register_engine
 from prophet import Prophet
-import xgboost as xgb
+import numpy as np
 import pandas as pd
-import os
+from src.calendar_cache import calendar_cache
+from src.series import FeatureMatrix, SeriesCollection
 from utils.logger import setup_logging
-from datetime import datetime
-from sklearn.metrics import mean_absolute_percentage_error
 
 
+@register_engine('prophet')
 class ProphetModel(BaseModel):
-    def __init__(self, config):
+    forecast_file = 'data/forecasts/prophet_forecast_{country}.xlsx'
+    level = 'national'
+
+    def __init__(self, config, writer=None):
         """
         Initializes the ProphetModel class.
         
@@ -17,90 +22,128 @@ class ProphetModel(BaseModel):
         -----------
         config : dict
             Configuration dictionary loaded from the config file.
+        writer : BackgroundWriter, optional
+            Writer used to save forecasts in the background.
         """
-        super().__init__(config)
-        self.model = None  # Will be initialized during training
+        super().__init__(config, writer=writer)
 
     @execution_time_logger
     def load_data(self, country):
         """
-        Loads and prepares the data for the Prophet model.
+        Loads and prepares the national-level series for the Prophet model.
+
+        Returns:
+        --------
+        tuple
+            (X, Y) where X only carries the dates (Prophet builds its own features)
+            and Y holds the 'national' series.
         """
         try:
             # Load national-level data
             country_config = self.config['countries'][country]
             cleaned_data_path = self.get_latest_cleaned_file(country_config['name'])
-            self.data = pd.read_excel(cleaned_data_path)
+            data = pd.read_excel(cleaned_data_path)
             self.logger.info(f"Cleaned data loaded from {cleaned_data_path}")
 
             # Ensure date column is in datetime format
-            self.data['date'] = pd.to_datetime(self.data['date'])
+            data['date'] = pd.to_datetime(data['date'])
+
+            Y = SeriesCollection.from_frame(data, columns=['national'])
+            X = FeatureMatrix(np.empty((len(Y), 0)), [], Y.date_offsets, Y.start)
+            return X, Y
 
         except Exception as e:
             self.logger.error(f"Error loading data: {e}")
             raise
 
-    @execution_time_logger
-    def preprocess_data(self):
+    def preprocess_data(self, X, y):
         """
-        Prepares the data for the Prophet model by renaming and filtering columns.
-        """
-        try:
-            # Select only necessary columns for Prophet ('ds' for date, 'y' for target)
-            self.data = self.data.rename(columns={'date': 'ds', 'national': 'y'})
-            self.logger.info("Data preprocessing completed for Prophet.")
-
-        except Exception as e:
-            self.logger.error(f"Error preprocessing data: {e}")
-            raise
+        Prepares a series for Prophet by building the 'ds'/'y' frame it expects.
 
-    @execution_time_logger
-    def fit(self):
+        Parameters:
+        -----------
+        X : FeatureMatrix
+            Feature matrix carrying the dates of the series.
+        y : np.ndarray
+            Target values.
+
+        Returns:
+        --------
+        pd.DataFrame
+            DataFrame with 'ds' for the date and 'y' for the target.
         """
-        Fits the Prophet model on the data.
+        return pd.DataFrame({'ds': X.dates, 'y': np.asarray(y, dtype=float)})
+
+    def fit_series(self, X, y, country):
         """
-        try:
-            self.model = Prophet(**self.config.get('model_params', {}).get('prophet', {}))
-            self.model.fit(self.data)
-            self.logger.info("Prophet model training complete.")
+        Fits a Prophet model on a single series.
 
-            # Make predictions on the training data to compute MAPE
-            y_true = self.data['y']  # Actual national sales values
-            y_pred = self.model.predict(self.data)['yhat']  # Predictions from the model
-            
-            # Calculate MAPE
-            train_mape = mean_absolute_percentage_error(y_true, y_pred)
-            self.logger.info(f"Train MAPE for Prophet: {train_mape:.4f}")
+        Prophet's simulated uncertainty intervals are disabled by default
+        (uncertainty_samples=0); intervals come from the empirical quantiles of
+        the in-sample residuals instead, widened with the horizon (see
+        `ProphetSeriesModel.add_intervals`).
 
-            # Save the trained Prophet model
-            self.save_model('prophet_model.pkl')
+        Only the compact `ProphetArtifact` of the fit is kept (and pickled), unless
+        the model uses features it does not support.
+        """
+        params = self.model_params(country)
+        params.setdefault('uncertainty_samples', 0)
+        model = Prophet(**params)
+        data = self.preprocess_data(X, y)
+        model.fit(data)
+
+        if ProphetArtifact.supports(model):
+            model = ProphetArtifact.from_prophet(model)
+        else:
+            self.logger.warning(f"Prophet model of {country} uses holidays, regressors, conditional seasonalities "
+                                f"or logistic growth. Keeping the full Prophet model.")
+
+        residuals = data['y'].values - model.predict(data[['ds']])['yhat'].values
+        residuals -= np.median(residuals)
+        residual_quantiles = {q: float(np.quantile(residuals, q)) for q in self.forecast_quantiles}
+        return ProphetSeriesModel(model, residual_quantiles)
+
+    def predict_series(self, model, X, country):
+        """
+        Predicts a single series with its fitted Prophet model.
+        """
+        return model.predict(X.dates)['yhat'].values
 
-        except Exception as e:
-            self.logger.error(f"Error fitting Prophet model: {e}")
-            raise
+    @execution_time_logger
+    def fit(self, X, Y, country):
+        """
+        Fits the Prophet model on the national series of the country.
+        """
+        super().fit(X, Y, country)
 
     @execution_time_logger
-    def forecast(self, country):
+    def forecast(self, X, country):
         """
         Makes future predictions using the Prophet model.
         """
         try:
             # Forecast for the next configured period
             forecast_periods = self.config['countries'][country].get('forecast_periods', 12)
-            future = self.model.make_future_dataframe(periods=forecast_periods, freq='W-MON')
-            self.forecast_df = self.model.predict(future)
+            model = self.model['national']
+            # History plus the future weeks, which are shared by every country ending on the same date
+            future_dates = X.dates.append(calendar_cache.future_dates(X.dates.max(), forecast_periods, 'W-MON'))
+            # Fitted rows get the one-step interval, future rows one widening with the horizon
+            horizons = np.concatenate([np.ones(len(X)), np.arange(1, forecast_periods + 1)])
+            forecast_df = model.add_intervals(model.predict(future_dates), horizons)
+            # Only the fitted values and intervals are kept, not every Prophet component
+            columns = ['ds', 'yhat', 'yhat_lower', 'yhat_upper'] + [
+                quantile_column('yhat', quantile) for quantile in self.forecast_quantiles]
+            self.forecast_df = forecast_df[[column for column in columns if column in forecast_df]]
             self.logger.info(f"Forecasting for {country} complete.")
 
-            # Save forecast to a CSV or Excel file
-            output_path = f"data/forecasts/prophet_forecast_{country}.xlsx"
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            self.forecast_df.to_excel(output_path, index=False)
-            self.logger.info(f"Forecast saved at {output_path}")
+            # Save forecast to an Excel file (in the background when a writer is set); the
+            # regional stage reads the in-sample fit from it
+            self.save_output(self.forecast_df, self.forecast_file.format(country=country))
+            self.store_forecast(self.forecast_df.iloc[-forecast_periods:], {'national': 'yhat'}, country,
+                                date_column='ds')
+
+            return self.forecast_df
 
         except Exception as e:
             self.logger.error(f"Error during forecasting: {e}")
             raise
-
-
-
-
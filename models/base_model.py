@@ -1,58 +1,352 @@
 import os
 import pickle
 import logging
+import numpy as np
 from abc import ABC, abstractmethod
+from joblib import Parallel, delayed
+from sklearn.metrics import mean_absolute_percentage_error
+from src.catalog import DEFAULT_CATALOG_PATH
+from src.forecast_store import DEFAULT_FORECAST_STORE, ForecastStore, new_run_id
+from src.drift_monitor import DEFAULT_STATE_PATH, DriftMonitor, ModelStateStore
+from src.series import FeatureMatrix, SeriesCollection, quantile_column
+from utils.file_utils import get_latest_cleaned_file
 from utils.logger import setup_logging
-import glob
 
 class BaseModel(ABC):
-    def __init__(self, config):
+    # Set by the registry when the class is registered as an engine
+    engine_name = None
+
+    # Engines able to fit all series in a single call (global GBMs, linear models)
+    # override fit_many/predict_many and set this flag.
+    vectorized = False
+
+    # Path of the forecast file written by `forecast`, formatted with the country key
+    forecast_file = None
+
+    # Hierarchy level of the forecasts in the forecast store ('national' or 'regional')
+    level = None
+
+    def __init__(self, config, writer=None):
         """
         Initializes the BaseModel class with a configuration.
-        
+
         Parameters:
         -----------
         config : dict
             Configuration dictionary loaded from the config file.
+        writer : BackgroundWriter, optional
+            Writer used to save outputs in the background. Outputs are written
+            synchronously when not provided.
         """
         self.config = config
         self.logger = setup_logging()
+        self.writer = writer
+        self.model = {}  # Fitted models keyed by series name
 
     @abstractmethod
     def load_data(self, country):
         """
-        Abstract method to load data for the model.
+        Abstract method to load the series collection for a country.
         Must be implemented by derived classes.
+
+        Returns:
+        --------
+        tuple
+            (X, Y) where X is the FeatureMatrix shared by all series and Y the
+            SeriesCollection of targets.
         """
         pass
 
     @abstractmethod
-    def preprocess_data(self):
+    def fit_series(self, X, y, country):
         """
-        Abstract method to preprocess data for the model.
+        Abstract method to fit the model for a single series.
         Must be implemented by derived classes.
+
+        Returns:
+        --------
+        object
+            The fitted model for the series.
         """
         pass
 
     @abstractmethod
-    def fit(self):
+    def predict_series(self, model, X, country):
         """
-        Abstract method to fit the model.
+        Abstract method to predict a single series with its fitted model.
         Must be implemented by derived classes.
+
+        Returns:
+        --------
+        array-like
+            Predictions aligned with the rows of X.
         """
         pass
 
     @abstractmethod
-    def forecast(self):
+    def forecast(self, X, country):
         """
-        Abstract method to forecast using the model.
+        Abstract method to forecast future periods using the fitted models.
         Must be implemented by derived classes.
         """
         pass
 
+    def model_params(self, country):
+        """
+        Returns the parameters configured for this engine and country.
+
+        Parameters:
+        -----------
+        country : str
+            Country key from the config file (e.g., 'country_1').
+
+        Returns:
+        --------
+        dict
+            Engine parameters from `model_params.<country>.<engine>`.
+        """
+        return dict(self.config.get('model_params', {}).get(country, {}).get(self.engine_name, {}) or {})
+
+    @property
+    def forecast_quantiles(self):
+        """
+        Quantile levels forecast alongside the point forecast (e.g., [0.1, 0.5, 0.9]).
+        """
+        return sorted(self.config.get('forecast_quantiles', []) or [])
+
+    @property
+    def uses_processes(self):
+        """
+        Whether per-series fitting runs in worker processes ('prefer: processes').
+        """
+        parallel_config = self.config.get('parallel', {})
+        return parallel_config.get('prefer', 'threads') == 'processes' and parallel_config.get('n_jobs', 1) != 1
+
+    def _parallel(self, prefer=None):
+        """
+        Returns a joblib Parallel instance configured from the 'parallel' config section.
+        """
+        parallel_config = self.config.get('parallel', {})
+        return Parallel(n_jobs=parallel_config.get('n_jobs', 1), prefer=prefer or parallel_config.get('prefer', 'threads'))
+
+    def fit_many(self, X, Y, country):
+        """
+        Fits one model per series in Y. Falls back to a parallel per-series loop;
+        vectorized engines override this to fit all series at once.
+
+        Parameters:
+        -----------
+        X : FeatureMatrix
+            Feature matrix shared by all series.
+        Y : SeriesCollection
+            Targets with one series per region.
+        country : str
+            Country key from the config file.
+
+        Returns:
+        --------
+        dict
+            Fitted models keyed by series name.
+        """
+        if self.uses_processes:
+            return self._fit_many_processes(X, Y, country)
+
+        models = self._parallel()(delayed(self.fit_series)(X, Y[series], country) for series in Y.columns)
+        self.model = dict(zip(Y.columns, models))
+        return self.model
+
+    def _fit_many_processes(self, X, Y, country):
+        """
+        Fits one model per series in worker processes. The feature matrix is
+        published once to shared memory and attached zero-copy by the workers,
+        so only the targets and the fitted models are pickled.
+        """
+        shared, handle = X.share()
+        try:
+            models = self._parallel('processes')(
+                delayed(_fit_series_shared)(type(self), self.config, handle, np.asarray(Y[series]), country)
+                for series in Y.columns
+            )
+        finally:
+            shared.unlink()
+
+        self.model = dict(zip(Y.columns, models))
+        return self.model
+
+    def predict_many(self, X, country):
+        """
+        Predicts every fitted series. Falls back to a parallel per-series loop;
+        vectorized engines override this to predict all series at once.
+
+        Parameters:
+        -----------
+        X : FeatureMatrix
+            Feature matrix shared by all series.
+        country : str
+            Country key from the config file.
+
+        Returns:
+        --------
+        SeriesCollection
+            Predictions with one series per fitted model, aligned with the rows of X.
+        """
+        series_names = list(self.model)
+        predictions = self._parallel('threads')(
+            delayed(self.predict_series)(self.model[series], X, country) for series in series_names
+        )
+        return SeriesCollection(np.column_stack(predictions), X.date_offsets, X.start, series_names)
+
+    def fit(self, X, Y, country):
+        """
+        Fits the series of a country, logs the train MAPE per series and saves the models.
+
+        With `retraining.enabled`, only the series selected by the drift monitor
+        (breached error threshold, drifted distribution, stale or new series) are
+        retrained; the others reuse their stored models.
+
+        Parameters:
+        -----------
+        X : FeatureMatrix
+            Feature matrix shared by all series.
+        Y : SeriesCollection
+            Targets with one series per region.
+        country : str
+            Country key from the config file.
+        """
+        try:
+            retrain = self._series_to_retrain(X, Y, country)
+            reused = {series: self.model[series] for series in Y.columns if series not in retrain}
+            if retrain:
+                self.fit_many(X, Y.select(retrain), country)
+                self.logger.info(f"{self.engine_name} models trained for {retrain} in {country}.")
+            if reused:
+                self.logger.info(f"Stored {self.engine_name} models reused for {list(reused)} in {country}.")
+            self.model = {series: reused[series] if series in reused else self.model[series] for series in Y.columns}
+
+            # Make predictions on the training data to compute MAPE
+            y_pred = self.predict_many(X, country)
+            for series in Y.columns:
+                train_mape = mean_absolute_percentage_error(Y[series], y_pred[series])
+                self.logger.info(f"Train MAPE for {series} in {country}: {train_mape:.4f}")
+
+            if retrain:
+                if self.config.get('retraining', {}).get('enabled', False):
+                    self._state_store().update(self.engine_name, country, DriftMonitor.training_state(
+                        Y.select(retrain), y_pred, features=DriftMonitor.feature_signature(X.feature_names)))
+                self.save_model(f"{self.engine_name}_model_{country}.pkl")
+
+        except Exception as e:
+            self.logger.error(f"Error training {self.engine_name} models for {country}: {e}")
+            raise
+
+    def _state_store(self):
+        return ModelStateStore(self.config.get('retraining', {}).get('state_path', DEFAULT_STATE_PATH))
+
+    def _series_to_retrain(self, X, Y, country):
+        """
+        Returns the series of Y to (re)train. Every series is retrained unless
+        `retraining.enabled` is set, in which case the stored models are loaded
+        into `self.model` and checked against the new weeks by the drift monitor.
+
+        Returns:
+        --------
+        list
+            Names of the series to retrain.
+        """
+        if not self.config.get('retraining', {}).get('enabled', False):
+            return list(Y.columns)
+
+        filename = f"{self.engine_name}_model_{country}.pkl"
+        model_dir = self.config.get('model_dir', 'models/saved_models')
+        if not os.path.exists(os.path.join(model_dir, filename)):
+            self.logger.info(f"No stored {self.engine_name} models for {country}. Training every series.")
+            return list(Y.columns)
+
+        self.load_model(filename)
+        state = self._state_store().load(self.engine_name, country)
+        state = state[state.index.isin(list(self.model))]
+        features = DriftMonitor.feature_signature(X.feature_names)
+        # Only models trained on the current features can predict the new weeks
+        self.model = {series: self.model[series] for series in state.index[state['features'] == features]
+                      if series in Y}
+
+        monitor = DriftMonitor.from_config(self.config)
+        rows = monitor.new_rows(Y, state)
+        predictions = self.predict_many(X.rows(rows), country) if self.model and rows is not None and rows.any() else None
+        reasons = monitor.check(Y, state, predictions, features=features)
+        for series, reason in reasons.items():
+            self.logger.info(f"Retraining {series} in {country}: {reason}.")
+
+        return self._expand_retraining([series for series in Y.columns if series in reasons], Y, country)
+
+    def _expand_retraining(self, retrain, Y, country):
+        """
+        Returns the series actually retrained when `retrain` is selected. Engines
+        whose series share a model (e.g., multi-output boosters) retrain all of them.
+        """
+        return retrain
+
+    def save_output(self, frame, output_path):
+        """
+        Saves an output DataFrame to Excel, in the background when a writer is set.
+
+        Parameters:
+        -----------
+        frame : pd.DataFrame
+            The output to save. It must not be modified afterwards.
+        output_path : str
+            Path of the Excel file.
+        """
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if self.writer is not None:
+            self.writer.submit(frame.to_excel, output_path, index=False)
+            self.logger.info(f"Output queued for writing at {output_path}")
+        else:
+            frame.to_excel(output_path, index=False)
+            self.logger.info(f"Output saved at {output_path}")
+
+    def store_forecast(self, frame, columns, country, date_column='date'):
+        """
+        Appends future forecasts to the consolidated forecast store, in the
+        background when a writer is set.
+
+        Parameters:
+        -----------
+        frame : pd.DataFrame
+            Forecast of the future periods with a date column, one column per
+            series and the quantile columns (e.g., 'region_1_p10') if any.
+        columns : dict
+            {series name: column of its point forecast in frame}.
+        country : str
+            Country key from the config file.
+        date_column : str
+            Name of the date column of frame.
+        """
+        store = ForecastStore(self.config.get('forecast_store', {}).get('path', DEFAULT_FORECAST_STORE),
+                              self.forecast_quantiles)
+        dates = frame[[date_column]].rename(columns={date_column: 'date'})
+        predictions = SeriesCollection.from_frame(
+            dates.join(frame[list(columns.values())].set_axis(list(columns), axis=1)))
+        # Series without quantile forecasts (e.g., routed to an engine producing none) are stored with NaN quantiles
+        quantiles = {
+            quantile: SeriesCollection.from_frame(dates.join(
+                frame.reindex(columns=[quantile_column(column, quantile) for column in columns.values()])
+                .set_axis(list(columns), axis=1)))
+            for quantile in self.forecast_quantiles
+            if any(quantile_column(column, quantile) in frame for column in columns.values())
+        }
+        long_frame = ForecastStore.to_long(self.config.get('run_id') or new_run_id(), country,
+                                           self.level or self.engine_name, predictions, quantiles)
+
+        if self.writer is not None:
+            self.writer.submit(store.append, long_frame)
+            self.logger.info(f"Forecasts of {country} queued for appending to {store.root}")
+        else:
+            store.append(long_frame)
+
     def save_model(self, filename):
         """
-        Saves the model to a file using pickle.
+        Saves the model to a file using pickle, in the background when a writer is set.
         
         Parameters:
         -----------
@@ -63,16 +357,45 @@ class BaseModel(ABC):
             model_dir = self.config.get('model_dir', 'models/saved_models')
             os.makedirs(model_dir, exist_ok=True)
             file_path = os.path.join(model_dir, filename)
-            
-            with open(file_path, 'wb') as f:
-                pickle.dump(self.model, f)
-            
-            self.logger.info(f"Model saved at {file_path}")
+
+            if self.writer is not None:
+                self.writer.submit(self._dump_model, self.model, file_path)
+                self.logger.info(f"Model queued for saving at {file_path}")
+            else:
+                self._dump_model(self.model, file_path)
+                self.logger.info(f"Model saved at {file_path}")
 
         except Exception as e:
             self.logger.error(f"Error saving model: {e}")
             raise
 
+    @staticmethod
+    def _dump_model(model, file_path):
+        with open(file_path, 'wb') as f:
+            pickle.dump(model, f)
+
+    def load_model(self, filename):
+        """
+        Loads a model previously saved with `save_model`.
+
+        Parameters:
+        -----------
+        filename : str
+            The name of the file to load the model from.
+        """
+        try:
+            model_dir = self.config.get('model_dir', 'models/saved_models')
+            file_path = os.path.join(model_dir, filename)
+
+            with open(file_path, 'rb') as f:
+                self.model = pickle.load(f)
+
+            self.logger.info(f"Model loaded from {file_path}")
+
+        except Exception as e:
+            self.logger.error(f"Error loading model: {e}")
+            raise
+
     def get_latest_cleaned_file(self, country):
         """
         Returns the latest cleaned file for the specified country.
@@ -88,20 +411,22 @@ class BaseModel(ABC):
             Path to the latest cleaned file.
         """
         try:
-            processed_folder = 'data/processed/'
-            search_pattern = f"{processed_folder}CleanedSales{country.replace(' ', '')}_*.xlsx"
-            list_of_files = glob.glob(search_pattern)
-
-            if not list_of_files:
-                raise FileNotFoundError(f"No cleaned data files found for {country}")
-            
-            latest_file = max(list_of_files, key=os.path.getctime)
-            return latest_file
+            return get_latest_cleaned_file(country, as_of_date=self.config.get('as_of_date'),
+                                           catalog_path=self.config.get('catalog', {}).get('path', DEFAULT_CATALOG_PATH))
 
         except Exception as e:
             self.logger.error(f"Error fetching the latest cleaned file: {e}")
             raise
 
+def _fit_series_shared(engine_class, config, handle, y, country):
+    """
+    Worker entry point of `BaseModel._fit_many_processes`: attaches to the shared
+    feature matrix, fits one series and detaches again.
+    """
+    engine = engine_class(config)
+    with FeatureMatrix.attached(handle) as X:
+        return engine.fit_series(X, y, country)
+
 def execution_time_logger(func):
     """
     Decorator to log the execution time of model methods.
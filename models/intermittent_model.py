@@ -0,0 +1,135 @@
+from models.item_model import RegionalModel
+from models.registry import register_engine
+import numpy as np
+from src.series import SeriesCollection
+
+METHODS = ('croston', 'sba', 'tsb')
+
+
+def croston(values, alpha=0.1, method='croston'):
+    """
+    Croston's method over many series at once: demand sizes and the intervals
+    between demands are smoothed separately, and the forecast is their ratio.
+    The recurrence runs once over the periods, updating every series together.
+
+    Parameters:
+    -----------
+    values : np.ndarray
+        Demand of shape (n_periods, n_series).
+    alpha : float
+        Smoothing constant of the sizes and intervals.
+    method : str
+        'croston', or 'sba' for the Syntetos-Boylan bias correction (1 - alpha / 2).
+
+    Returns:
+    --------
+    np.ndarray
+        Flat per-period forecast of every series (0 for series without demand).
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    demand = values > 0
+    has_demand = demand.any(axis=0)
+    first = demand.argmax(axis=0)
+    columns = np.arange(values.shape[1])
+
+    # Initialized on the first demand: its size and the periods elapsed until it
+    size = values[first, columns]
+    interval = first + 1.0
+    since_demand = np.zeros(values.shape[1])
+    for t in range(values.shape[0]):
+        since_demand += 1
+        update = demand[t] & (t > first)
+        size = np.where(update, size + alpha * (values[t] - size), size)
+        interval = np.where(update, interval + alpha * (since_demand - interval), interval)
+        since_demand = np.where(demand[t], 0, since_demand)
+
+    forecast = np.where(has_demand, size / interval, 0.0)
+    return forecast * (1 - alpha / 2) if method == 'sba' else forecast
+
+
+def tsb(values, alpha=0.1, beta=0.1):
+    """
+    Teunter-Syntetos-Babai method over many series at once: the demand
+    probability is updated every period, so the forecast of series whose
+    demand stops decays towards zero.
+
+    Parameters:
+    -----------
+    values : np.ndarray
+        Demand of shape (n_periods, n_series).
+    alpha : float
+        Smoothing constant of the demand sizes.
+    beta : float
+        Smoothing constant of the demand probability.
+
+    Returns:
+    --------
+    np.ndarray
+        Flat per-period forecast of every series.
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    demand = values > 0
+    first = demand.argmax(axis=0)
+    columns = np.arange(values.shape[1])
+
+    size = np.where(demand.any(axis=0), values[first, columns], 0.0)
+    probability = demand.mean(axis=0)
+    for t in range(values.shape[0]):
+        size = np.where(demand[t], size + alpha * (values[t] - size), size)
+        probability = probability + beta * (demand[t] - probability)
+
+    return probability * size
+
+
+@register_engine('croston')
+class IntermittentModel(RegionalModel):
+    """
+    Region-wise forecasting of intermittent (mostly zero) demand with Croston,
+    SBA or TSB (`method` in the config). Every series of a country is smoothed
+    in one vectorized pass over the periods; the features are not used.
+
+    The forecast of a series is flat, so every row of X gets the same value.
+    Regions classified as intermittent during cleaning are routed to this
+    engine by the other regional engines (see `RegionalModel.fit`).
+    """
+    vectorized = True
+
+    def _smooth(self, values, country):
+        """
+        Returns the flat forecast of every column of values.
+        """
+        params = self.model_params(country)
+        method = params.get('method', 'sba')
+        if method not in METHODS:
+            raise ValueError(f"Unknown intermittent method '{method}'. Available methods: {list(METHODS)}")
+        if method == 'tsb':
+            return tsb(values, params.get('alpha', 0.1), params.get('beta', 0.1))
+        return croston(values, params.get('alpha', 0.1), method)
+
+    def fit_series(self, X, y, country):
+        """
+        Smooths a single series and returns its flat forecast.
+        """
+        return float(self._smooth(np.asarray(y).reshape(-1, 1), country)[0])
+
+    def predict_series(self, model, X, country):
+        """
+        Repeats the flat forecast of a series for every row of X.
+        """
+        return np.full(len(X), model, dtype=np.float32)
+
+    def fit_many(self, X, Y, country):
+        """
+        Smooths every series in a single pass over the periods.
+        """
+        forecasts = self._smooth(Y.values, country)
+        self.model = {series: float(forecasts[i]) for i, series in enumerate(Y.columns)}
+        self.logger.info(f"Intermittent demand models trained for {list(Y.columns)} in {country}.")
+        return self.model
+
+    def predict_many(self, X, country):
+        """
+        Repeats the flat forecast of every series for every row of X.
+        """
+        forecasts = np.array(list(self.model.values()), dtype=np.float32)
+        return SeriesCollection(np.tile(forecasts, (len(X), 1)), X.date_offsets, X.start, list(self.model))
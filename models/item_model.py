@@ -1,24 +1,40 @@
-from models.base_model import BaseModel, execution_time_logger
-from prophet import Prophet
+from models.base_model import BaseModel, execution_time_logger, quantile_column
+from models.registry import get_engine, register_engine
 import xgboost as xgb
+import numpy as np
 import pandas as pd
-import os
+from src.calendar_cache import calendar_cache
+from src.catalog import CleanedDataCatalog, DEFAULT_CATALOG_PATH
+from src.feature_builder import FeatureBuilder
+from src.series import FeatureMatrix, SeriesCollection
 from utils.logger import setup_logging
-from datetime import datetime
-from sklearn.metrics import mean_absolute_percentage_error
 
-class XGBoostModel(BaseModel):
-    def __init__(self, config):
+# Features carrying the national trajectory, perturbed by the what-if scenarios
+NATIONAL_FEATURES = ('national', 'yhat', 'National_forecast')
+
+class RegionalModel(BaseModel):
+    forecast_file = 'data/forecasts/region_forecast_{country}.xlsx'
+    level = 'regional'
+
+    def __init__(self, config, writer=None):
         """
-        Initializes the XGBoost model class.
+        Base class for region-wise engines. Loads the regional series with the
+        national-level forecast as a feature and forecasts every region.
+
+        Regions classified as intermittent during cleaning are fitted and
+        forecast by the engine configured under `engines.intermittent`.
         
         Parameters:
         -----------
         config : dict
             Configuration dictionary loaded from the config file.
+        writer : BackgroundWriter, optional
+            Writer used to save forecasts in the background.
         """
-        super().__init__(config)
-        self.model = None  # Will be initialized during training
+        super().__init__(config, writer=writer)
+        self.feature_builder = FeatureBuilder(config)
+        self.demand_classes = {}  # {region: 'smooth' or 'intermittent'} of the loaded snapshot
+        self.intermittent = None  # Engine fitted on the intermittent regions
 
     @execution_time_logger
     def load_data(self, country):
@@ -32,6 +48,8 @@ class XGBoostModel(BaseModel):
             cleaned_data_path = self.get_latest_cleaned_file(country_config['name'])
             data = pd.read_excel(cleaned_data_path)
             self.logger.info(f"Cleaned data loaded from {cleaned_data_path}")
+            self.demand_classes = CleanedDataCatalog(
+                self.config.get('catalog', {}).get('path', DEFAULT_CATALOG_PATH)).demand_classes(cleaned_data_path)
             
             # Load the national-level forecast as a feature
             national_forecast_path = f"data/forecasts/prophet_forecast_{country}.xlsx"
@@ -46,107 +64,445 @@ class XGBoostModel(BaseModel):
             data.drop(columns=['ds'], inplace=True)
             self.logger.info("National forecast merged with historical data.")
             
-            # Generate lagged features
-            region_columns = ['region_1', 'region_2', 'region_3']
+            # Generate lagged features on the compact float32 representation
+            series = SeriesCollection.from_frame(data)
+            region_columns = [col for col in series.columns if col.startswith('region')]
             num_lags = self.config['countries'][country].get('num_lags', 4)
-            data_with_lags = self.create_lagged_features(data, region_columns, 'national', num_lags)
+            X, y = self.create_lagged_features(series, region_columns, 'national', num_lags,
+                                               self.config['countries'][country].get('features'))
 
-            # Drop the 'date' and region columns for XGBoost features
-            X = data_with_lags.drop(columns=['region_1', 'region_2', 'region_3'])
-            y = data_with_lags[['region_1', 'region_2', 'region_3']]
-            
             return X, y
 
         except Exception as e:
             self.logger.error(f"Error loading data for {country}: {e}")
             raise
 
-    def create_lagged_features(self, data, region_columns, national_column, num_lags=7):
+    def create_lagged_features(self, series, region_columns, national_column, num_lags=7, feature_config=None):
         """
-        Creates lagged features for regional sales and adds the national forecast as a feature.
+        Creates lagged, rolling-window and calendar features for regional sales and
+        adds the national forecast as a feature.
         
         Parameters:
         -----------
-        data : pd.DataFrame
-            Data containing regional sales and national forecast.
+        series : SeriesCollection
+            Series containing regional sales and national forecast.
         region_columns : list
             List of regional sales column names.
         national_column : str
             Column name for national sales forecast.
         num_lags : int
             Number of lagged features to create.
+        feature_config : dict, optional
+            The country's 'features' config (rolling windows, EWMAs, calendar features).
         
         Returns:
         --------
-        pd.DataFrame:
-            DataFrame with lagged features added.
+        tuple:
+            (X, y) as a FeatureMatrix and a SeriesCollection of the regional targets.
         """
-        for region in region_columns:
-            for lag in range(1, num_lags + 1):
-                data[f'{region}_lag{lag}'] = data[region].shift(lag)
-        
-        data['National_forecast'] = data[national_column]
-        
-        # Drop rows with NaN values resulting from lagging
-        data = data.dropna()
-        return data
+        return self.feature_builder.build(series, region_columns, national_column, num_lags, feature_config)
+
+    @property
+    def intermittent_engine(self):
+        """
+        Name of the engine forecasting the intermittent regions, or None when
+        they are not routed (e.g., this engine is the intermittent engine).
+        """
+        engine_name = self.config.get('engines', {}).get('intermittent', 'croston')
+        return engine_name if engine_name and engine_name != self.engine_name else None
+
+    def _intermittent_regions(self, y):
+        """
+        Returns the regions of y to route to the intermittent engine.
+        """
+        if self.intermittent_engine is None:
+            return []
+        return [region for region in y.columns if self.demand_classes.get(region) == 'intermittent']
 
     @execution_time_logger
     def fit(self, X, y, country):
         """
-        Train the XGBoost model on the full dataset.
+        Train the regional models on the full dataset. Intermittent regions are
+        trained by the intermittent engine, the others by this engine.
         """
-        try:
-            region_models = {}
-            for region in y.columns:
-                model_params = self.config['model_params'][country]['xgboost']
-                model = xgb.XGBRegressor(**model_params)
-                model.fit(X.drop(columns=['date']), y[region])
-                region_models[region] = model
-                self.logger.info(f"XGBoost model trained for {region} in {country}.")
-
-                # Make predictions on the training data to compute MAPE
-                y_pred = model.predict(X.drop(columns=['date']))  # Predictions for training data
-                train_mape = mean_absolute_percentage_error(y[region], y_pred)  # Calculate MAPE
-                self.logger.info(f"Train MAPE for {region} in {country}: {train_mape:.4f}")
-            
-            self.model = region_models
-
-        except Exception as e:
-            self.logger.error(f"Error training XGBoost model for {country}: {e}")
-            raise
+        # Drop the engines of a previous country, so they do not forecast this one
+        self.model = {}
+        self.intermittent = None
+        intermittent = self._intermittent_regions(y)
+        if intermittent:
+            self.logger.info(f"Routing intermittent regions {intermittent} of {country} to the "
+                             f"{self.intermittent_engine} engine.")
+            self.intermittent = get_engine(self.intermittent_engine)(self.config, writer=self.writer)
+            self.intermittent.fit(X, y.select(intermittent), country)
+            y = y.select([region for region in y.columns if region not in intermittent])
+        if y.columns:
+            super().fit(X, y, country)
 
     @execution_time_logger
-    def forecast(self, X_future, country, forecast_periods=12):
+    def forecast(self, X_future, country):
         """
-        Forecast the next 12 periods using the XGBoost model.
+        Forecast the next configured periods using the regional models.
         """
         try:
+            forecast_periods = self.config['countries'][country].get('forecast_periods', 12)
+
             # Create a DataFrame to store forecast results
             forecast = pd.DataFrame()
 
             # Generate future dates
-            future_dates = pd.date_range(start=pd.to_datetime(X_future['date'].max()) + pd.DateOffset(weeks=1), 
-                                         periods=forecast_periods, freq='W-MON')
-            forecast['date'] = future_dates
+            forecast['date'] = calendar_cache.future_dates(X_future.dates.max(), forecast_periods, 'W-MON')
 
-            # Drop the 'date' column from X_future
-            X_future = X_future.drop(columns=['date'])
+            # Forecast every region on the last forecast_periods data points, with this
+            # engine and with the intermittent engine for the regions routed to it
+            X_forecast = self._forecast_rows(X_future, country)
+            regions = []
+            for engine in self._engines():
+                predictions = engine.predict_many(X_forecast, country)
+                for region in predictions.columns:
+                    forecast[region] = predictions[region]
+                regions.extend(predictions.columns)
 
-            # Forecast for each region
-            for region, model in self.model.items():
-                # Ensure the X_future only has the next 12 data points
-                forecast[region] = model.predict(X_future.iloc[-forecast_periods:])
+                # Add the quantile forecasts of engines that produce them
+                for region, quantile_predictions in engine.predict_quantiles_many(X_forecast, country).items():
+                    for j, quantile in enumerate(self.forecast_quantiles):
+                        forecast[quantile_column(region, quantile)] = quantile_predictions[:, j]
 
-            # Save forecast to a CSV or Excel file
-            output_path = f"data/forecasts/region_forecast_{country}.xlsx"
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            forecast.to_excel(output_path, index=False)
-            self.logger.info(f"Region-wise forecast saved at {output_path}")
+            # Save forecast to an Excel file and append it to the forecast store
+            # (in the background when a writer is set)
+            self.save_output(forecast, self.forecast_file.format(country=country))
+            self.store_forecast(forecast, {region: region for region in regions}, country)
+
+            return forecast
 
         except Exception as e:
             self.logger.error(f"Error forecasting region-wise sales for {country}: {e}")
             raise
 
-    def preprocess_data(self):
-        pass
\ No newline at end of file
+    def _forecast_rows(self, X_future, country):
+        """
+        Returns the rows of X the future periods are forecast from (the last forecast_periods rows).
+        """
+        return X_future.rows(slice(-self.config['countries'][country].get('forecast_periods', 12), None))
+
+    def _engines(self):
+        """
+        Returns the fitted engines forecasting the regions: this one and the intermittent engine.
+        """
+        return [engine for engine in (self, self.intermittent) if engine is not None and engine.model]
+
+    def load_fitted(self, country):
+        """
+        Loads the features and the stored models of a country, e.g. to run
+        what-if scenarios without refitting.
+
+        Returns:
+        --------
+        FeatureMatrix
+            The features of the country, as passed to `forecast`.
+        """
+        X, y = self.load_data(country)
+        # Drop the engines of a previous country; regions without a demand class are smooth
+        self.model = {}
+        self.intermittent = None
+        classes = {self.demand_classes.get(region, 'smooth') for region in y.columns}
+        if self.intermittent_engine is None or 'smooth' in classes:
+            self.load_model(f"{self.engine_name}_model_{country}.pkl")
+        if self.intermittent_engine is not None and 'intermittent' in classes:
+            self.intermittent = get_engine(self.intermittent_engine)(self.config, writer=self.writer)
+            self.intermittent.load_model(f"{self.intermittent_engine}_model_{country}.pkl")
+        return X
+
+    def what_if(self, X_future, national_factors, country):
+        """
+        Forecasts the regions under many perturbations of the national trajectory
+        at once. The forecast rows are stacked once per scenario with their
+        national features (`NATIONAL_FEATURES`) scaled, and every fitted engine
+        predicts the whole stack in a single call.
+
+        Parameters:
+        -----------
+        X_future : FeatureMatrix
+            Features of the country, as passed to `forecast`.
+        national_factors : array-like
+            Multiplicative factors applied to the national features, of shape
+            (n_scenarios,) for a constant factor per scenario (e.g., 1.1 for
+            national demand +10%) or (n_scenarios, forecast_periods) for a
+            factor per period.
+        country : str
+            Country key from the config file.
+
+        Returns:
+        --------
+        tuple
+            (forecasts, regions) where forecasts has shape (n_scenarios, n_regions,
+            forecast_periods) and regions lists the regions in its second axis.
+        """
+        try:
+            X_forecast = self._forecast_rows(X_future, country)
+            n_periods = len(X_forecast)
+            factors = np.asarray(national_factors, dtype=np.float32)
+            factors = np.broadcast_to(factors.reshape(len(factors), -1), (len(factors), n_periods))
+            n_scenarios = len(factors)
+
+            national = [i for i, name in enumerate(X_forecast.feature_names) if name in NATIONAL_FEATURES]
+            if not national:
+                raise ValueError(f"No national features among {X_forecast.feature_names}")
+
+            stacked = np.tile(X_forecast.values, (n_scenarios, 1))
+            stacked[:, national] *= factors.reshape(-1, 1)
+            X_stacked = FeatureMatrix(stacked, X_forecast.feature_names, np.tile(X_forecast.date_offsets, n_scenarios),
+                                      X_forecast.start)
+
+            predictions = [engine.predict_many(X_stacked, country) for engine in self._engines()]
+            regions = [region for engine_predictions in predictions for region in engine_predictions.columns]
+            values = np.hstack([engine_predictions.values for engine_predictions in predictions])
+            return values.reshape(n_scenarios, n_periods, len(regions)).transpose(0, 2, 1), regions
+
+        except Exception as e:
+            self.logger.error(f"Error forecasting what-if scenarios for {country}: {e}")
+            raise
+
+    def predict_quantiles_many(self, X, country):
+        """
+        Predicts the configured forecast quantiles of every region. Engines that
+        only produce point forecasts return an empty dict.
+
+        Returns:
+        --------
+        dict
+            {region: array of shape (n_rows, n_quantiles)}
+        """
+        return {}
+
+
+class RegionBooster:
+    """
+    Fitted XGBoost booster for one region. With multi-output training all regions
+    share the same booster and each one reads its own output column. When the
+    booster was trained with early stopping, only the trees up to the best
+    iteration are used for prediction (all of them for a booster retrained for
+    that number of rounds).
+    """
+
+    def __init__(self, booster, output_index=None, best_iteration=None, quantiles=None):
+        self.booster = booster
+        self.output_index = output_index
+        self.best_iteration = best_iteration
+        self.quantiles = quantiles  # Quantile levels of a multi-quantile booster
+
+    @property
+    def iteration_range(self):
+        """
+        Range of trees used for prediction ((0, 0) means all trees).
+        """
+        return (0, self.best_iteration + 1) if self.best_iteration is not None else (0, 0)
+
+    def predict_all(self, values):
+        """
+        Predicts every output of the booster from a float32 feature array without building a DMatrix.
+        """
+        return self.booster.inplace_predict(values, iteration_range=self.iteration_range)
+
+    def predict_quantiles(self, values):
+        """
+        Predicts every quantile of a multi-quantile booster, sorted to avoid quantile crossing.
+
+        Returns:
+        --------
+        np.ndarray
+            Predictions of shape (n_rows, n_quantiles).
+        """
+        return np.sort(self.predict_all(values).reshape(len(values), -1), axis=1)
+
+    def predict(self, values):
+        """
+        Predicts the region from a float32 feature array. The point forecast of a
+        multi-quantile booster is its median (or middle) quantile.
+        """
+        if self.quantiles:
+            point_index = self.quantiles.index(0.5) if 0.5 in self.quantiles else len(self.quantiles) // 2
+            return self.predict_quantiles(values)[:, point_index]
+
+        predictions = self.predict_all(values)
+        if self.output_index is not None:
+            predictions = predictions[:, self.output_index]
+        return predictions
+
+
+@register_engine('xgboost')
+class XGBoostModel(RegionalModel):
+    """
+    Region-wise forecasting with XGBoost. The shared feature matrix is quantized
+    once per country and reused for every region, optionally training a single
+    multi-output model for all regions (`multi_output: true` in the config).
+
+    With `early_stopping_rounds` configured, the best number of boosting rounds is
+    searched with the last `validation_periods` rows held out (in time order), then
+    each region is retrained on all rows for that number of rounds, so the most
+    recent periods also shape the final model.
+
+    With `forecast_quantiles` configured, every region is trained as a single
+    multi-quantile model (objective 'reg:quantileerror').
+
+    With `parallel.prefer: processes`, regions are trained in worker processes
+    that attach to the feature matrix in shared memory instead of receiving a copy.
+    """
+
+    def _train_params(self, country):
+        """
+        Splits the configured parameters into booster parameters and training options.
+
+        Returns:
+        --------
+        tuple
+            (params, options) where options holds 'num_boost_round', 'multi_output',
+            'early_stopping_rounds' and 'validation_periods'.
+        """
+        params = self.model_params(country)
+        options = {
+            'num_boost_round': params.pop('n_estimators', 100),
+            'multi_output': params.pop('multi_output', False),
+            'early_stopping_rounds': params.pop('early_stopping_rounds', None),
+            'validation_periods': params.pop('validation_periods', 12),
+        }
+        params.setdefault('tree_method', 'hist')
+
+        if self.forecast_quantiles:
+            params.update(objective='reg:quantileerror', quantile_alpha=self.forecast_quantiles)
+            if options['multi_output']:
+                self.logger.warning(f"Multi-output training is not supported with quantile forecasts. "
+                                    f"Training one multi-quantile model per region for {country}.")
+                options['multi_output'] = False
+        return params, options
+
+    def _quantile_dmatrices(self, X, params, options, country):
+        """
+        Quantizes the shared feature matrix once so that every region reuses it.
+
+        Returns:
+        --------
+        tuple
+            (dtrain, dsearch, dvalid, search_rows, valid_rows). dtrain holds all rows;
+            dsearch and dvalid split them for the early stopping search and are None
+            without early stopping.
+        """
+        max_bin = params.get('max_bin', 256)
+        validation_periods = options['validation_periods']
+        dtrain = xgb.QuantileDMatrix(X.values, feature_names=X.feature_names, max_bin=max_bin)
+
+        if options['early_stopping_rounds'] and len(X) > 2 * validation_periods:
+            # Time-ordered holdout: the most recent periods are used for validation
+            search_rows, valid_rows = slice(0, -validation_periods), slice(-validation_periods, None)
+            dsearch = xgb.QuantileDMatrix(X.values[search_rows], feature_names=X.feature_names, ref=dtrain)
+            dvalid = xgb.QuantileDMatrix(X.values[valid_rows], feature_names=X.feature_names, ref=dsearch)
+            return dtrain, dsearch, dvalid, search_rows, valid_rows
+
+        if options['early_stopping_rounds']:
+            self.logger.warning(f"Not enough periods in {country} for a {validation_periods}-period "
+                                f"validation split. Training without early stopping.")
+        return dtrain, None, None, None, None
+
+    def _train(self, targets, params, options, dtrain, dsearch, dvalid, search_rows, valid_rows):
+        """
+        Trains one booster on the given targets. With a validation set, the best
+        number of rounds is first searched on the earlier rows, then the booster is
+        retrained on all rows for that number of rounds.
+
+        Returns:
+        --------
+        tuple
+            (booster, best_iteration). best_iteration is None without early stopping.
+        """
+        dtrain.set_label(targets)
+        if dvalid is None:
+            return xgb.train(params, dtrain, num_boost_round=options['num_boost_round']), None
+
+        dsearch.set_label(targets[search_rows])
+        dvalid.set_label(targets[valid_rows])
+        search = xgb.train(params, dsearch, num_boost_round=options['num_boost_round'],
+                           evals=[(dvalid, 'validation')],
+                           early_stopping_rounds=options['early_stopping_rounds'], verbose_eval=False)
+        best_iteration = search.best_iteration
+        return xgb.train(params, dtrain, num_boost_round=best_iteration + 1), best_iteration
+
+    def fit_series(self, X, y, country):
+        """
+        Trains the XGBoost model for a single region directly on the float32 feature matrix.
+        """
+        params, options = self._train_params(country)
+        dmatrices = self._quantile_dmatrices(X, params, options, country)
+        booster, best_iteration = self._train(np.asarray(y), params, options, *dmatrices)
+        return RegionBooster(booster, best_iteration=best_iteration, quantiles=self.forecast_quantiles or None)
+
+    def predict_series(self, model, X, country):
+        """
+        Predicts a single region with its fitted XGBoost model.
+        """
+        return model.predict(X.values)
+
+    def fit_many(self, X, Y, country):
+        """
+        Trains every region on a single QuantileDMatrix, either one booster per
+        region or one multi-output booster for all regions.
+        """
+        params, options = self._train_params(country)
+
+        if not options['multi_output'] and self.uses_processes:
+            # Regions are trained in worker processes attached to the feature matrix in shared memory
+            super().fit_many(X, Y, country)
+            self._log_best_iterations(country, options)
+            return self.model
+
+        dmatrices = self._quantile_dmatrices(X, params, options, country)
+
+        if options['multi_output']:
+            booster, best_iteration = self._train(Y.values, {**params, 'multi_strategy': 'multi_output_tree'},
+                                                  options, *dmatrices)
+            self.model = {region: RegionBooster(booster, i, best_iteration) for i, region in enumerate(Y.columns)}
+        else:
+            self.model = {}
+            for region in Y.columns:
+                booster, best_iteration = self._train(Y[region], params, options, *dmatrices)
+                self.model[region] = RegionBooster(booster, best_iteration=best_iteration,
+                                                   quantiles=self.forecast_quantiles or None)
+
+        self._log_best_iterations(country, options)
+        return self.model
+
+    def _expand_retraining(self, retrain, Y, country):
+        """
+        Retrains every region when one of them needs it and the regions share a multi-output booster.
+        """
+        if retrain and self._train_params(country)[1]['multi_output']:
+            return list(Y.columns)
+        return retrain
+
+    def _log_best_iterations(self, country, options):
+        for region, model in self.model.items():
+            if model.best_iteration is not None:
+                self.logger.info(f"Best iteration for {region} in {country}: {model.best_iteration} "
+                                 f"of {options['num_boost_round']}.")
+
+    def predict_many(self, X, country):
+        """
+        Predicts every region, running a shared multi-output booster only once.
+        """
+        predictions = {}
+        shared_predictions = {}
+        for region, model in self.model.items():
+            if model.output_index is None:
+                predictions[region] = model.predict(X.values)
+            else:
+                key = id(model.booster)
+                if key not in shared_predictions:
+                    shared_predictions[key] = model.predict_all(X.values)
+                predictions[region] = shared_predictions[key][:, model.output_index]
+
+        return SeriesCollection(np.column_stack(list(predictions.values())), X.date_offsets, X.start,
+                                list(predictions))
+
+    def predict_quantiles_many(self, X, country):
+        """
+        Predicts the quantiles of every region trained with the quantile objective.
+        """
+        return {region: model.predict_quantiles(X.values) for region, model in self.model.items() if model.quantiles}
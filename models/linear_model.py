@@ -0,0 +1,62 @@
+from models.item_model import RegionalModel
+from models.registry import register_engine
+import numpy as np
+from src.series import SeriesCollection
+
+
+@register_engine('linear')
+class LinearModel(RegionalModel):
+    """
+    Region-wise forecasting with ridge regression. All regions share the same
+    feature matrix, so every region is solved in a single least-squares call.
+    """
+    vectorized = True
+
+    def _design_matrix(self, X):
+        """
+        Builds the design matrix (features plus an intercept column) from X.
+        """
+        return np.hstack([X.values.astype(float), np.ones((len(X), 1))])
+
+    def _solve(self, X, Y, country):
+        """
+        Solves the ridge regression for every column of Y at once.
+
+        Returns:
+        --------
+        np.ndarray
+            Coefficients with one column per series (intercept in the last row).
+        """
+        alpha = self.model_params(country).get('alpha', 1.0)
+        A = self._design_matrix(X)
+        penalty = alpha * np.eye(A.shape[1])
+        penalty[-1, -1] = 0.0  # Do not penalize the intercept
+        return np.linalg.solve(A.T @ A + penalty, A.T @ np.asarray(Y, dtype=float))
+
+    def fit_series(self, X, y, country):
+        """
+        Fits the ridge regression for a single series.
+        """
+        return self._solve(X, np.asarray(y).reshape(-1, 1), country)[:, 0]
+
+    def predict_series(self, model, X, country):
+        """
+        Predicts a single series with its ridge coefficients.
+        """
+        return self._design_matrix(X) @ model
+
+    def fit_many(self, X, Y, country):
+        """
+        Fits every series in a single least-squares solve.
+        """
+        coefficients = self._solve(X, Y.values, country)
+        self.model = {series: coefficients[:, i] for i, series in enumerate(Y.columns)}
+        self.logger.info(f"Linear models trained for {list(Y.columns)} in {country}.")
+        return self.model
+
+    def predict_many(self, X, country):
+        """
+        Predicts every series with a single matrix product.
+        """
+        coefficients = np.column_stack(list(self.model.values()))
+        return SeriesCollection(self._design_matrix(X) @ coefficients, X.date_offsets, X.start, list(self.model))
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+from src.calendar_cache import calendar_cache, fourier_series
+from src.series import quantile_column
+
+# This module only depends on NumPy and pandas, so pickled national models can be
+# loaded and used for prediction without importing prophet or cmdstanpy.
+
+
+class ProphetArtifact:
+    """
+    Compact, prediction-only form of a fitted Prophet model.
+
+    Only the fitted parameters (averaged over the posterior samples as in
+    Prophet's point predictions), the changepoints, the time and value scales
+    and the seasonality configuration are kept. The training history, the fit
+    frame and the Stan backend state are dropped, so the artifact size does
+    not grow with the history length. Predictions reproduce Prophet's `yhat`
+    with NumPy only.
+
+    Linear and flat growth with additive or multiplicative seasonalities are
+    supported; see `supports`.
+    """
+
+    def __init__(self, start, t_scale, y_scale, floor, growth, k, m, deltas, changepoints_t, seasonalities, beta):
+        self.start = pd.Timestamp(start)
+        self.t_scale = float(t_scale)  # Days
+        self.y_scale = float(y_scale)
+        self.floor = float(floor)
+        self.growth = growth
+        self.k = float(k)
+        self.m = float(m)
+        self.deltas = np.asarray(deltas, dtype=float)
+        self.changepoints_t = np.asarray(changepoints_t, dtype=float)
+        self.seasonalities = seasonalities  # [(period, fourier_order, mode)] in Prophet's feature order
+        self.beta = np.asarray(beta, dtype=float)
+
+    @staticmethod
+    def supports(prophet):
+        """
+        Returns whether a fitted Prophet model can be converted: no holidays,
+        extra regressors, conditional seasonalities or logistic growth.
+        """
+        return (prophet.growth in ('linear', 'flat') and prophet.holidays is None
+                and not getattr(prophet, 'country_holidays', None) and not prophet.extra_regressors
+                and all(props['condition_name'] is None for props in prophet.seasonalities.values()))
+
+    @classmethod
+    def from_prophet(cls, prophet):
+        """
+        Extracts the artifact of a fitted Prophet model.
+
+        Raises:
+        -------
+        ValueError
+            If the model uses features the artifact does not support.
+        """
+        if not cls.supports(prophet):
+            raise ValueError("Only Prophet models with linear or flat growth and plain seasonalities "
+                             "(no holidays, extra regressors or conditions) can be converted")
+        floor = prophet.y_min if getattr(prophet, 'scaling', 'absmax') == 'minmax' else 0.0
+        return cls(
+            start=prophet.start,
+            t_scale=prophet.t_scale / pd.Timedelta(days=1),
+            y_scale=prophet.y_scale,
+            floor=floor,
+            growth=prophet.growth,
+            k=np.nanmean(prophet.params['k']),
+            m=np.nanmean(prophet.params['m']),
+            deltas=np.nanmean(prophet.params['delta'], axis=0),
+            changepoints_t=prophet.changepoints_t,
+            seasonalities=[(props['period'], props['fourier_order'], props['mode'])
+                           for props in prophet.seasonalities.values()],
+            beta=np.nanmean(prophet.params['beta'], axis=0),
+        )
+
+    def trend(self, t):
+        """
+        Returns the scaled trend at the scaled times t.
+        """
+        if self.growth == 'flat':
+            return np.full_like(t, self.m)
+        deltas_t = (self.changepoints_t[None, :] <= t[:, None]) * self.deltas
+        return (self.k + deltas_t.sum(axis=1)) * t + self.m + (deltas_t * -self.changepoints_t).sum(axis=1)
+
+    def predict(self, df):
+        """
+        Predicts the dates of df['ds'].
+
+        Returns:
+        --------
+        pd.DataFrame
+            'ds', 'trend', 'additive_terms', 'multiplicative_terms' and 'yhat', as in Prophet's prediction frame.
+        """
+        dates = pd.to_datetime(pd.Series(df['ds'])).sort_values(kind='mergesort').reset_index(drop=True)
+        t = ((dates - self.start) / pd.Timedelta(days=1)).to_numpy(dtype=float) / self.t_scale
+        # Regular ranges (e.g., the weekly history and horizon of a forecast) read their
+        # Fourier terms from the calendar cache shared by the countries of the run
+        freq = pd.infer_freq(dates) if len(dates) >= 3 else None
+
+        terms = {'additive': np.zeros(len(dates)), 'multiplicative': np.zeros(len(dates))}
+        col = 0
+        for period, fourier_order, mode in self.seasonalities:
+            if freq is not None:
+                features = calendar_cache.fourier_terms(dates[0], len(dates), freq, period, fourier_order)
+            else:
+                features = fourier_series(dates, period, fourier_order)
+            terms[mode] += features @ self.beta[col:col + 2 * fourier_order]
+            col += 2 * fourier_order
+
+        trend = self.trend(t) * self.y_scale + self.floor
+        additive = terms['additive'] * self.y_scale
+        multiplicative = terms['multiplicative']
+        return pd.DataFrame({
+            'ds': dates,
+            'trend': trend,
+            'additive_terms': additive,
+            'multiplicative_terms': multiplicative,
+            'yhat': trend * (1 + multiplicative) + additive,
+        })
+
+
+class ProphetSeriesModel:
+    """
+    Fitted national model together with the quantiles of its in-sample residuals,
+    which give the prediction intervals without Prophet's trend simulations.
+    `prophet` is the compact `ProphetArtifact` of the fit, or the Prophet model
+    itself when it uses features the artifact does not support.
+    """
+
+    def __init__(self, prophet, residual_quantiles):
+        self.prophet = prophet
+        self.residual_quantiles = residual_quantiles  # {quantile level: residual quantile minus the median residual}
+
+    def predict(self, dates):
+        """
+        Predicts the series for the given dates.
+
+        Returns:
+        --------
+        pd.DataFrame
+            Prediction frame with 'ds', 'yhat' and the components.
+        """
+        return self.prophet.predict(pd.DataFrame({'ds': dates}))
+
+    def add_intervals(self, forecast_df, horizons=None):
+        """
+        Adds the quantile columns (e.g., 'yhat_p10') to a prediction frame by
+        shifting 'yhat' with the residual quantiles, scaled by the square root of
+        the horizon as for a random walk of the one-step errors. The residuals are
+        centred on their median, so 'yhat_p50' equals 'yhat'. 'yhat_lower'/'yhat_upper'
+        are set to the outermost quantiles.
+
+        Parameters:
+        -----------
+        forecast_df : pd.DataFrame
+            Prediction frame with 'yhat'.
+        horizons : array-like, optional
+            Forecast horizon of every row (1 for fitted, in-sample rows). Defaults to 1.
+        """
+        scale = np.sqrt(np.ones(len(forecast_df)) if horizons is None else np.asarray(horizons, dtype=float))
+        for quantile, residual in self.residual_quantiles.items():
+            forecast_df[quantile_column('yhat', quantile)] = forecast_df['yhat'] + residual * scale
+        if self.residual_quantiles:
+            forecast_df['yhat_lower'] = forecast_df['yhat'] + min(self.residual_quantiles.values()) * scale
+            forecast_df['yhat_upper'] = forecast_df['yhat'] + max(self.residual_quantiles.values()) * scale
+        return forecast_df
@@ -0,0 +1,89 @@
+import importlib
+from utils.logger import setup_logging
+
+# Engines registered by name, e.g. {'prophet': ProphetModel, 'xgboost': XGBoostModel}
+_ENGINES = {}
+
+# Modules that register the built-in engines when imported
+_BUILTIN_ENGINE_MODULES = [
+    'models.aggregate_model',
+    'models.intermittent_model',
+    'models.item_model',
+    'models.linear_model',
+]
+
+
+def register_engine(name):
+    """
+    Class decorator registering a model class as a forecasting engine.
+
+    Parameters:
+    -----------
+    name : str
+        Name under which the engine is referenced in the config file (e.g., 'xgboost').
+
+    Returns:
+    --------
+    callable
+        Decorator returning the registered class unchanged.
+    """
+    def decorator(cls):
+        registered = _ENGINES.get(name)
+        if registered is not None and registered is not cls:
+            raise ValueError(f"Engine '{name}' is already registered by {registered.__name__}")
+        cls.engine_name = name
+        _ENGINES[name] = cls
+        return cls
+    return decorator
+
+
+def load_engine_modules(modules):
+    """
+    Imports modules so that the engines defined in them register themselves.
+
+    Parameters:
+    -----------
+    modules : list
+        Dotted module paths (e.g., ['models.item_model', 'my_package.lightgbm_engine']).
+    """
+    logger = setup_logging()
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            # A missing optional dependency only disables the engines of that module
+            logger.warning(f"Could not import engine module '{module}': {e}")
+
+
+def get_engine(name):
+    """
+    Returns the engine class registered under the given name.
+
+    Parameters:
+    -----------
+    name : str
+        Name of the engine (e.g., 'prophet', 'xgboost', 'linear').
+
+    Returns:
+    --------
+    type
+        The registered model class.
+    """
+    if name not in _ENGINES:
+        load_engine_modules(_BUILTIN_ENGINE_MODULES)
+    if name not in _ENGINES:
+        raise ValueError(f"Unknown engine '{name}'. Available engines: {sorted(_ENGINES)}")
+    return _ENGINES[name]
+
+
+def available_engines():
+    """
+    Returns the names of all registered engines.
+
+    Returns:
+    --------
+    list
+        Sorted list of engine names.
+    """
+    load_engine_modules(_BUILTIN_ENGINE_MODULES)
+    return sorted(_ENGINES)
@@ -22,8 +22,13 @@ setup(
         'prophet',
         'pyyaml',
         'xgboost',
-        'plotly'
+        'plotly',
+        'pyarrow'
     ],
+    extras_require={
+        'dask': ['dask[distributed]'],
+        'ray': ['ray']
+    },
     author='Mallikarjun Yelameli',
     author_email='mallikarjun.yelameli@live.com',
     description='A machine learning forecasting system',
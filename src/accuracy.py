@@ -0,0 +1,200 @@
+import os
+import numpy as np
+import pandas as pd
+from src.catalog import CleanedDataCatalog, DEFAULT_CATALOG_PATH
+from utils.logger import setup_logging
+
+DEFAULT_ACCURACY_CACHE = 'data/forecasts/accuracy'
+
+# Keys of the cached error statistics
+GROUP_COLUMNS = ['run_id', 'country', 'level', 'series', 'horizon']
+
+# Additive error statistics, so cached results can be updated with new actuals only
+STAT_COLUMNS = ['n', 'abs_error', 'abs_actual', 'error', 'ape', 'n_ape']
+
+
+def load_actuals(config):
+    """
+    Returns the actuals of every configured country from its latest cleaned snapshot.
+    Countries without any snapshot yet (e.g., their cleaning failed on the first
+    run) are skipped with a warning, so the other countries are still evaluated.
+
+    Returns:
+    --------
+    pd.DataFrame
+        Long format actuals with the columns country, series, date and actual.
+    """
+    catalog = CleanedDataCatalog(config.get('catalog', {}).get('path', DEFAULT_CATALOG_PATH))
+    frames = []
+    for country, country_config in config['countries'].items():
+        try:
+            path = catalog.latest(country_config['name'])
+        except FileNotFoundError as e:
+            setup_logging().warning(f"Skipping the actuals of {country}: {e}")
+            continue
+        data = pd.read_excel(path)
+        actuals = data.melt(id_vars='date', var_name='series', value_name='actual')
+        actuals.insert(0, 'country', country)
+        frames.append(actuals)
+    if not frames:
+        return pd.DataFrame(columns=['country', 'series', 'date', 'actual']).astype({'date': 'datetime64[ns]', 'actual': float})
+    actuals = pd.concat(frames, ignore_index=True)
+    actuals['date'] = pd.to_datetime(actuals['date'])
+    return actuals
+
+
+class AccuracyTracker:
+    """
+    Tracks forecast accuracy by joining the forecasts of the forecast store
+    with the actuals observed later.
+
+    Errors are kept as additive statistics per (run, country, level, series,
+    horizon) in a Parquet cache, together with the last actual date evaluated
+    per country. Each update only reads the forecasts dated after that
+    watermark and evaluates the new actuals, and MAPE, WAPE and bias are
+    derived from the statistics with group-bys at any aggregation level.
+    """
+
+    def __init__(self, store, cache_dir=DEFAULT_ACCURACY_CACHE):
+        """
+        Parameters:
+        -----------
+        store : ForecastStore
+            Store of the historical forecasts.
+        cache_dir : str
+            Folder of the cached error statistics.
+        """
+        self.store = store
+        self.cache_dir = cache_dir
+        self.logger = setup_logging()
+        self.stats_path = os.path.join(cache_dir, 'stats.parquet')
+        self.watermarks_path = os.path.join(cache_dir, 'watermarks.parquet')
+
+    def statistics(self):
+        """
+        Returns the cached error statistics.
+        """
+        if not os.path.exists(self.stats_path):
+            return pd.DataFrame(columns=GROUP_COLUMNS + STAT_COLUMNS)
+        return pd.read_parquet(self.stats_path)
+
+    def watermarks(self):
+        """
+        Returns the last evaluated actual date of every country as a Series.
+        """
+        if not os.path.exists(self.watermarks_path):
+            return pd.Series(dtype='datetime64[ns]', name='date')
+        return pd.read_parquet(self.watermarks_path).set_index('country')['date']
+
+    @staticmethod
+    def error_statistics(forecasts, actuals):
+        """
+        Joins forecasts with actuals and sums the errors per group.
+
+        Parameters:
+        -----------
+        forecasts : pd.DataFrame
+            Forecasts with the `GROUP_COLUMNS`, date and value.
+        actuals : pd.DataFrame
+            Actuals with the columns country, series, date and actual.
+
+        Returns:
+        --------
+        pd.DataFrame
+            The `STAT_COLUMNS` per group of `GROUP_COLUMNS`.
+        """
+        joined = forecasts.merge(actuals, on=['country', 'series', 'date'], how='inner')
+        actual = joined['actual'].to_numpy(dtype=float)
+        error = joined['value'].to_numpy(dtype=float) - actual
+        nonzero = actual != 0
+        joined = joined[GROUP_COLUMNS].assign(
+            n=1,
+            abs_error=np.abs(error),
+            abs_actual=np.abs(actual),
+            error=error,
+            ape=np.where(nonzero, np.abs(error) / np.where(nonzero, np.abs(actual), 1.0), 0.0),
+            n_ape=nonzero.astype(np.int64),
+        )
+        return joined.groupby(GROUP_COLUMNS, observed=True, sort=False)[STAT_COLUMNS].sum().reset_index()
+
+    def update(self, actuals):
+        """
+        Evaluates the forecasts of the store against the actuals newer than the
+        cached watermarks and adds them to the cached statistics.
+
+        Parameters:
+        -----------
+        actuals : pd.DataFrame
+            Actuals with the columns country, series, date and actual.
+
+        Returns:
+        --------
+        int
+            Number of forecast rows evaluated.
+        """
+        try:
+            watermarks = self.watermarks()
+            actuals = actuals.dropna(subset=['actual'])
+            new_actuals = actuals[actuals['date'] > actuals['country'].map(watermarks).fillna(pd.Timestamp.min)]
+            if new_actuals.empty:
+                self.logger.info("No new actuals to evaluate.")
+                return 0
+
+            # Only forecasts dated after the earliest watermark of the updated countries are read
+            countries = list(new_actuals['country'].unique())
+            since = new_actuals.groupby('country')['date'].min().min()
+            forecasts = self.store.read(columns=GROUP_COLUMNS + ['date', 'value'], since=since, country=countries)
+            forecasts['date'] = forecasts['date'].astype('datetime64[ns]')
+            for column in ('run_id', 'country', 'level', 'series'):
+                forecasts[column] = forecasts[column].astype('category')
+
+            new_stats = self.error_statistics(forecasts, new_actuals)
+            stats = self.statistics()
+            if not stats.empty:
+                stats = pd.concat([stats, new_stats], ignore_index=True)
+                stats = stats.groupby(GROUP_COLUMNS, observed=True, sort=False)[STAT_COLUMNS].sum().reset_index()
+            else:
+                stats = new_stats
+
+            new_watermarks = new_actuals.groupby('country')['date'].max()
+            if not watermarks.empty:
+                new_watermarks = pd.concat([watermarks, new_watermarks]).groupby(level=0).max()
+            watermarks = new_watermarks
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for column in ('run_id', 'country', 'level', 'series'):
+                stats[column] = stats[column].astype(str)
+            stats.to_parquet(self.stats_path, index=False)
+            watermarks.rename_axis('country').rename('date').reset_index().to_parquet(self.watermarks_path, index=False)
+
+            n_evaluated = int(new_stats['n'].sum())
+            self.logger.info(f"{n_evaluated} forecasts evaluated against new actuals of {countries}.")
+            return n_evaluated
+
+        except Exception as e:
+            self.logger.error(f"Error updating forecast accuracy: {e}")
+            raise
+
+    def report(self, by=('country', 'level', 'series', 'horizon')):
+        """
+        Returns MAPE, WAPE and bias aggregated over the given columns.
+
+        Parameters:
+        -----------
+        by : list
+            Columns among the `GROUP_COLUMNS` to aggregate by (e.g., ['run_id']).
+
+        Returns:
+        --------
+        pd.DataFrame
+            One row per group with n, mape, wape and bias (mean error relative
+            to the mean absolute actual; positive means over-forecasting).
+        """
+        stats = self.statistics().groupby(list(by), observed=True)[STAT_COLUMNS].sum()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return pd.DataFrame({
+                'n': stats['n'],
+                'mape': stats['ape'] / stats['n_ape'],
+                'wape': stats['abs_error'] / stats['abs_actual'],
+                'bias': stats['error'] / stats['abs_actual'],
+            }).reset_index()
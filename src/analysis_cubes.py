@@ -0,0 +1,237 @@
+import os
+import numpy as np
+import pandas as pd
+from src.accuracy import GROUP_COLUMNS, STAT_COLUMNS
+from utils.logger import setup_logging
+
+DEFAULT_CUBES_PATH = 'data/forecasts/cubes'
+
+# Keys of the forecasts of one series in the store
+SERIES_COLUMNS = ['country', 'level', 'series']
+
+# Keys and additive totals of the monthly rollups, so cached rollups can be updated with new actuals only
+ROLLUP_COLUMNS = ['run_id'] + SERIES_COLUMNS + ['month']
+ROLLUP_STAT_COLUMNS = ['periods', 'forecast', 'observed', 'actual']
+
+
+class AnalysisCubes:
+    """
+    Pre-aggregated result-analysis tables written as Parquet files at the end
+    of every run, so that notebooks and dashboards load small summaries
+    instead of recomputing them from the raw forecasts:
+
+    - errors.parquet: accuracy per (run, country, level, series, horizon) with
+      the additive error statistics, so they can be rolled up further;
+    - actual_vs_forecast.parquet: the actuals of every series followed by the
+      forecast (and quantiles) of the latest run of its country and level;
+    - rollups.parquet: forecast and actual totals per (run, country, level,
+      series, month), the actual total only covering the weeks observed so far.
+
+    Only the latest runs are read for actual_vs_forecast. The rollups are kept
+    up to date incrementally like the accuracy statistics: runs not rolled up
+    yet are read once, and older runs are only read for the actuals newer than
+    the last actual date rolled up per country.
+    """
+
+    def __init__(self, store, tracker, cube_dir=DEFAULT_CUBES_PATH):
+        """
+        Parameters:
+        -----------
+        store : ForecastStore
+            Store of the historical forecasts.
+        tracker : AccuracyTracker
+            Tracker of the cached error statistics.
+        cube_dir : str
+            Folder of the cube files.
+        """
+        self.store = store
+        self.tracker = tracker
+        self.cube_dir = cube_dir
+        self.logger = setup_logging()
+        self.rollups_path = os.path.join(cube_dir, 'rollups.parquet')
+        self.watermarks_path = os.path.join(cube_dir, 'rollup_watermarks.parquet')
+
+    def errors(self):
+        """
+        Returns the error statistics with MAPE, WAPE and bias per run, country, level, series and horizon.
+        """
+        stats = self.tracker.statistics()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return stats.assign(
+                mape=stats['ape'] / stats['n_ape'],
+                wape=stats['abs_error'] / stats['abs_actual'],
+                bias=stats['error'] / stats['abs_actual'],
+            )[GROUP_COLUMNS + STAT_COLUMNS + ['mape', 'wape', 'bias']]
+
+    def _read_runs(self, runs, columns, since=None, country=None):
+        """
+        Reads the forecasts of the given (run_id, country, level) rows of `ForecastStore.runs`.
+        """
+        filters = {'run_id': list(runs['run_id'].unique())}
+        if country is not None:
+            filters['country'] = country
+        forecasts = self.store.read(columns=columns, since=since, **filters)
+        forecasts['date'] = forecasts['date'].astype('datetime64[ns]')
+        # Runs are filtered per country and level, e.g., a partition of an older run
+        return forecasts.merge(runs, on=['run_id', 'country', 'level'], how='inner')
+
+    def actual_vs_forecast(self, actuals, forecasts):
+        """
+        Returns the actuals of every series followed by the forecast of its latest run.
+
+        Parameters:
+        -----------
+        actuals : pd.DataFrame
+            Actuals with the columns country, series, date and actual.
+        forecasts : pd.DataFrame
+            Forecasts of the latest run of every country and level.
+
+        Returns:
+        --------
+        pd.DataFrame
+            One row per (country, series, date) with the actual, the latest
+            forecast and its quantiles, and the run_id of that forecast.
+        """
+        levels = forecasts[SERIES_COLUMNS].drop_duplicates()
+        actuals = actuals.merge(levels, on=['country', 'series'], how='left')
+        frame = actuals.merge(forecasts.rename(columns=lambda column: column.replace('value', 'forecast')),
+                              on=SERIES_COLUMNS + ['date'], how='outer')
+        columns = SERIES_COLUMNS + ['date', 'actual', 'run_id'] + [
+            column for column in frame.columns if column.startswith('forecast')]
+        return frame[columns].sort_values(SERIES_COLUMNS + ['date']).reset_index(drop=True)
+
+    @staticmethod
+    def monthly_totals(forecasts, actuals, how='left'):
+        """
+        Joins forecasts with actuals and sums them per `ROLLUP_COLUMNS`.
+
+        Parameters:
+        -----------
+        forecasts : pd.DataFrame
+            Forecasts with the columns run_id, country, level, series, date and value.
+        actuals : pd.DataFrame
+            Actuals with the columns country, series, date and actual.
+        how : str
+            'left' to count every forecast period, 'inner' to only add the
+            actuals of forecast periods (periods and forecast are then 0).
+
+        Returns:
+        --------
+        pd.DataFrame
+            The `ROLLUP_STAT_COLUMNS` per group of `ROLLUP_COLUMNS`.
+        """
+        joined = forecasts.merge(actuals, on=['country', 'series', 'date'], how=how)
+        joined['month'] = joined['date'].dt.to_period('M').dt.to_timestamp()
+        totals = (joined.groupby(ROLLUP_COLUMNS, observed=True)
+                  .agg(periods=('value', 'size'), forecast=('value', 'sum'),
+                       observed=('actual', 'count'), actual=('actual', 'sum'))
+                  .reset_index())
+        if how == 'inner':
+            totals[['periods', 'forecast']] *= 0  # Keeps the dtypes of a full rollup
+        return totals
+
+    def cached_rollups(self):
+        """
+        Returns the rollups written by the previous build. Rollups without
+        watermarks (written by an older version) are rebuilt from scratch.
+        """
+        if not os.path.exists(self.rollups_path) or not os.path.exists(self.watermarks_path):
+            return pd.DataFrame(columns=ROLLUP_COLUMNS + ROLLUP_STAT_COLUMNS)
+        return pd.read_parquet(self.rollups_path)
+
+    def watermarks(self):
+        """
+        Returns the last actual date rolled up for every country as a Series.
+        """
+        if not os.path.exists(self.watermarks_path):
+            return pd.Series(dtype='datetime64[ns]', name='date')
+        return pd.read_parquet(self.watermarks_path).set_index('country')['date']
+
+    def rollups(self, actuals, runs):
+        """
+        Updates the cached forecast and actual totals per run, country, level,
+        series and month with the runs and actuals added since the last build.
+
+        Parameters:
+        -----------
+        actuals : pd.DataFrame
+            Actuals with the columns country, series, date and actual.
+        runs : pd.DataFrame
+            Stored runs (see `ForecastStore.runs`).
+
+        Returns:
+        --------
+        tuple
+            (rollups, watermarks) to cache for the next build.
+        """
+        columns = ['run_id'] + SERIES_COLUMNS + ['date', 'value']
+        cached = self.cached_rollups()
+        watermarks = self.watermarks()
+        totals = [cached]
+
+        # Runs rolled up by a previous build only need the actuals that arrived since
+        rolled_up = runs.merge(cached[['run_id', 'country', 'level']].drop_duplicates(),
+                               on=['run_id', 'country', 'level'], how='left', indicator=True)
+        old_runs = runs[(rolled_up['_merge'] == 'both').to_numpy()]
+        new_runs = runs[(rolled_up['_merge'] == 'left_only').to_numpy()]
+        new_actuals = actuals[actuals['date'] > actuals['country'].map(watermarks).fillna(pd.Timestamp.min)]
+        if not old_runs.empty and not new_actuals.empty:
+            forecasts = self._read_runs(old_runs, columns, since=new_actuals['date'].min(),
+                                        country=list(new_actuals['country'].unique()))
+            totals.append(self.monthly_totals(forecasts, new_actuals, how='inner'))
+
+        # New runs are rolled up once against every actual
+        if not new_runs.empty:
+            totals.append(self.monthly_totals(self._read_runs(new_runs, columns), actuals))
+
+        totals = [frame for frame in totals if not frame.empty]
+        rollups = (pd.concat(totals, ignore_index=True)
+                   .groupby(ROLLUP_COLUMNS, observed=True)[ROLLUP_STAT_COLUMNS].sum().reset_index()
+                   if totals else cached)
+        if not actuals.empty:
+            new_watermarks = actuals.groupby('country')['date'].max()
+            if not watermarks.empty:
+                new_watermarks = pd.concat([watermarks, new_watermarks]).groupby(level=0).max()
+            watermarks = new_watermarks
+        return rollups, watermarks
+
+    def build(self, actuals):
+        """
+        Builds every cube and writes it to the cube folder.
+
+        Parameters:
+        -----------
+        actuals : pd.DataFrame
+            Actuals with the columns country, series, date and actual.
+
+        Returns:
+        --------
+        dict
+            {cube name: path of its Parquet file}.
+        """
+        try:
+            actuals = actuals.dropna(subset=['actual'])
+            runs = self.store.runs()
+            latest = runs[runs['run_id'] == runs.groupby(['country', 'level'])['run_id'].transform('max')]
+            forecasts = self._read_runs(latest, SERIES_COLUMNS + ['run_id', 'date', 'value']
+                                        + self.store.quantile_columns)
+            rollups, watermarks = self.rollups(actuals, runs)
+            cubes = {
+                'errors': self.errors(),
+                'actual_vs_forecast': self.actual_vs_forecast(actuals, forecasts),
+                'rollups': rollups,
+            }
+
+            os.makedirs(self.cube_dir, exist_ok=True)
+            paths = {}
+            for name, cube in cubes.items():
+                paths[name] = os.path.join(self.cube_dir, f"{name}.parquet")
+                cube.to_parquet(paths[name], index=False)
+            watermarks.rename_axis('country').rename('date').reset_index().to_parquet(self.watermarks_path, index=False)
+            self.logger.info(f"Analysis cubes written to {self.cube_dir}: "
+                             + ', '.join(f"{name} ({len(cube)} rows)" for name, cube in cubes.items()))
+            return paths
+
+        except Exception as e:
+            self.logger.error(f"Error building analysis cubes: {e}")
+            raise
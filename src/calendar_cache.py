@@ -0,0 +1,150 @@
+import threading
+import numpy as np
+import pandas as pd
+from utils.logger import setup_logging
+
+
+def fourier_series(dates, period, order):
+    """
+    Returns the Fourier terms of a seasonality at the given dates, with the same
+    convention as Prophet (time in days since the epoch, columns sin(1), cos(1),
+    ..., sin(order), cos(order)).
+
+    Parameters:
+    -----------
+    dates : pd.DatetimeIndex or pd.Series
+        Dates to compute the terms at.
+    period : float
+        Period of the seasonality in days (e.g., 365.25 for yearly).
+    order : int
+        Number of Fourier pairs.
+
+    Returns:
+    --------
+    np.ndarray
+        Array of shape (len(dates), 2 * order).
+    """
+    days = ((pd.DatetimeIndex(dates) - pd.Timestamp('1970-01-01')) / pd.Timedelta(days=1)).to_numpy(dtype=float)
+    angles = 2 * np.pi * days[:, None] * np.arange(1, order + 1) / period
+    terms = np.empty((len(days), 2 * order))
+    terms[:, 0::2] = np.sin(angles)
+    terms[:, 1::2] = np.cos(angles)
+    return terms
+
+
+class CalendarCache:
+    """
+    Cache of calendar data shared by every country and series with the same
+    calendar (most countries use the same W-MON weeks).
+
+    Date ranges, week numbers, seasonality Fourier terms and holiday flags are
+    computed once per (start, periods, freq, ...) key and returned as read-only
+    arrays, so they can be shared between series and threads without copies.
+    """
+
+    def __init__(self):
+        self.logger = setup_logging()
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key, compute):
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        value = compute()
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        with self._lock:
+            return self._cache.setdefault(key, value)
+
+    def date_range(self, start, periods, freq='W-MON'):
+        """
+        Returns `periods` dates from `start` with the given frequency.
+
+        Returns:
+        --------
+        pd.DatetimeIndex
+            The (immutable) date range.
+        """
+        start = pd.Timestamp(start)
+        return self._get(('date_range', start, periods, freq),
+                         lambda: pd.date_range(start=start, periods=periods, freq=freq))
+
+    def future_dates(self, last_date, periods, freq='W-MON'):
+        """
+        Returns the `periods` dates following `last_date` (e.g., the forecast horizon).
+        """
+        last_date = pd.Timestamp(last_date)
+        return self._get(('future_dates', last_date, periods, freq),
+                         lambda: pd.date_range(start=last_date, periods=periods + 1, freq=freq)[1:])
+
+    def fourier_terms(self, start, periods, freq, period, order):
+        """
+        Returns the Fourier terms (see `fourier_series`) of a seasonality over a date range.
+
+        Parameters:
+        -----------
+        start : str or datetime
+            First date of the range.
+        periods : int
+            Number of dates.
+        freq : str
+            Frequency of the range (e.g., 'W-MON').
+        period : float
+            Period of the seasonality in days (e.g., 365.25 for yearly).
+        order : int
+            Number of Fourier pairs.
+
+        Returns:
+        --------
+        np.ndarray
+            Read-only array of shape (periods, 2 * order).
+        """
+        return self._get(('fourier', pd.Timestamp(start), periods, freq, float(period), order),
+                         lambda: fourier_series(self.date_range(start, periods, freq), period, order))
+
+    def week_of_year(self, start, periods, freq='W-MON'):
+        """
+        Returns the ISO week of year of every date as a read-only int8 array.
+        """
+        return self._get(('week_of_year', pd.Timestamp(start), periods, freq),
+                         lambda: self.date_range(start, periods, freq).isocalendar().week.to_numpy(dtype=np.int8))
+
+    def holiday_flags(self, start, periods, freq, country_code):
+        """
+        Returns 1 for every period containing a public holiday of the country
+        (the 7 days starting at the date for weekly data), 0 otherwise.
+
+        Parameters:
+        -----------
+        start : str or datetime
+            First date of the range.
+        periods : int
+            Number of dates.
+        freq : str
+            Frequency of the range (e.g., 'W-MON').
+        country_code : str
+            Country code understood by the `holidays` package (e.g., 'US').
+
+        Returns:
+        --------
+        np.ndarray
+            Read-only int8 array of shape (periods,).
+        """
+        def compute():
+            import holidays
+
+            dates = self.date_range(start, periods, freq)
+            span_days = 7 if freq.startswith('W') else 1
+            years = range(dates.min().year, dates.max().year + 2)
+            holiday_days = pd.DatetimeIndex(list(holidays.country_holidays(country_code, years=years).keys()))
+            # Day index of every holiday relative to the first date, looked up per period window
+            offsets = np.sort((holiday_days - dates[0]).days.to_numpy())
+            starts = (dates - dates[0]).days.to_numpy()
+            counts = np.searchsorted(offsets, starts + span_days) - np.searchsorted(offsets, starts)
+            return (counts > 0).astype(np.int8)
+        return self._get(('holidays', pd.Timestamp(start), periods, freq, country_code), compute)
+
+
+# Cache shared by all models of the process
+calendar_cache = CalendarCache()
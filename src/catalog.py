@@ -0,0 +1,241 @@
+import os
+import glob
+import hashlib
+import sqlite3
+import pandas as pd
+from contextlib import contextmanager
+from datetime import datetime
+from utils.logger import setup_logging
+
+DEFAULT_CATALOG_PATH = 'data/processed/catalog.sqlite'
+
+
+class CleanedDataCatalog:
+    """
+    SQLite manifest of the cleaned data snapshots written to `data/processed/`.
+
+    Every snapshot is recorded with its country, path, creation time, date range,
+    row count and content hash. "Latest" and "as of date" lookups are indexed
+    queries instead of globbing the folder and stating every file, and old
+    snapshots can be compacted away.
+
+    A new connection is opened per operation so the catalog can be used from the
+    background writer thread.
+    """
+
+    def __init__(self, catalog_path=DEFAULT_CATALOG_PATH):
+        """
+        Parameters:
+        -----------
+        catalog_path : str
+            Path of the SQLite catalog file.
+        """
+        self.catalog_path = catalog_path
+        self.logger = setup_logging()
+        os.makedirs(os.path.dirname(catalog_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    country TEXT NOT NULL,
+                    path TEXT NOT NULL UNIQUE,
+                    created_at TEXT NOT NULL,
+                    start_date TEXT,
+                    end_date TEXT,
+                    n_rows INTEGER,
+                    content_hash TEXT
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_created ON snapshots (country, created_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS demand_classes (
+                    path TEXT NOT NULL,
+                    series TEXT NOT NULL,
+                    zero_ratio REAL,
+                    demand_class TEXT NOT NULL,
+                    PRIMARY KEY (path, series)
+                )""")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.catalog_path, timeout=30)
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def hash_data(data):
+        """
+        Returns a content hash of a DataFrame, independent of the file format it is saved in.
+        """
+        row_hashes = pd.util.hash_pandas_object(data, index=False).values
+        return hashlib.sha256(row_hashes.tobytes() + ','.join(map(str, data.columns)).encode()).hexdigest()
+
+    def register(self, country, path, data, date_column='date', created_at=None, demand_classes=None):
+        """
+        Records a cleaned snapshot. Re-registering the same path replaces its entry.
+
+        Parameters:
+        -----------
+        country : str
+            Name of the country (e.g., 'Country 1').
+        path : str
+            Path of the saved snapshot.
+        data : pd.DataFrame
+            The cleaned data that was saved.
+        date_column : str
+            Name of the date column (used for the date range).
+        created_at : datetime, optional
+            Creation time of the snapshot. Defaults to now.
+        demand_classes : pd.DataFrame, optional
+            Demand class of every series of the snapshot (see `DataCleaner.classify_demand`).
+        """
+        try:
+            dates = pd.to_datetime(data[date_column]) if date_column in data.columns else None
+            created_at = (created_at or datetime.now()).isoformat(timespec='seconds')
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (country, path, created_at,
+                     dates.min().date().isoformat() if dates is not None else None,
+                     dates.max().date().isoformat() if dates is not None else None,
+                     len(data), self.hash_data(data)))
+                conn.execute("DELETE FROM demand_classes WHERE path = ?", (path,))
+                if demand_classes is not None:
+                    conn.executemany(
+                        "INSERT INTO demand_classes VALUES (?, ?, ?, ?)",
+                        [(path, row.series, float(row.zero_ratio), row.demand_class)
+                         for row in demand_classes.itertuples(index=False)])
+            self.logger.info(f"Snapshot {path} registered in the catalog for {country}.")
+
+        except Exception as e:
+            self.logger.error(f"Error registering snapshot {path}: {e}")
+            raise
+
+    def _index_existing(self, country):
+        """
+        Registers snapshots saved before the catalog existed (one-off folder scan).
+        """
+        pattern = os.path.join(os.path.dirname(self.catalog_path),
+                               f"CleanedSales{country.replace(' ', '')}_*.xlsx")
+        for path in sorted(glob.glob(pattern), key=os.path.getmtime):
+            self.register(country, path, pd.read_excel(path),
+                          created_at=datetime.fromtimestamp(os.path.getmtime(path)))
+
+    def _query_one(self, query, params):
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchone()
+
+    def latest(self, country):
+        """
+        Returns the path of the most recent snapshot for the country.
+
+        Parameters:
+        -----------
+        country : str
+            Name of the country (e.g., 'Country 1').
+
+        Returns:
+        --------
+        str
+            Path to the latest cleaned file.
+        """
+        return self.as_of(country, None)
+
+    def as_of(self, country, as_of_date):
+        """
+        Returns the path of the most recent snapshot created on or before a date.
+
+        Parameters:
+        -----------
+        country : str
+            Name of the country (e.g., 'Country 1').
+        as_of_date : str or datetime, optional
+            Cut-off date. None returns the latest snapshot.
+
+        Returns:
+        --------
+        str
+            Path to the cleaned file.
+        """
+        query = "SELECT path FROM snapshots WHERE country = ?"
+        params = [country]
+        if as_of_date is not None:
+            # Include the whole day of the cut-off date
+            query += " AND created_at < ?"
+            params.append((pd.Timestamp(as_of_date).normalize() + pd.Timedelta(days=1)).isoformat())
+        query += " ORDER BY created_at DESC, rowid DESC LIMIT 1"
+
+        row = self._query_one(query, params)
+        if row is None and self._query_one("SELECT 1 FROM snapshots WHERE country = ?", [country]) is None:
+            self._index_existing(country)
+            row = self._query_one(query, params)
+        if row is None:
+            raise FileNotFoundError(f"No cleaned data files found for {country}"
+                                    + (f" as of {as_of_date}" if as_of_date is not None else ""))
+        return row[0]
+
+    def demand_classes(self, path):
+        """
+        Returns the demand class of every series of a snapshot, e.g.
+        {'region_1': 'smooth', 'region_2': 'intermittent'}. Snapshots registered
+        without classification return an empty dict.
+        """
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT series, demand_class FROM demand_classes WHERE path = ?", (path,)))
+
+    def snapshots(self, country=None):
+        """
+        Returns the catalog entries as a DataFrame, newest first.
+        """
+        query = "SELECT * FROM snapshots"
+        params = []
+        if country is not None:
+            query += " WHERE country = ?"
+            params.append(country)
+        with self._connect() as conn:
+            return pd.read_sql_query(query + " ORDER BY country, created_at DESC, rowid DESC", conn, params=params)
+
+    def compact(self, keep=7):
+        """
+        Garbage-collects old snapshots: for every country only the `keep` most
+        recent snapshots are kept, older ones and snapshots whose content is
+        identical to a newer one are deleted from disk and from the catalog.
+        Entries whose file no longer exists are dropped as well.
+
+        Parameters:
+        -----------
+        keep : int
+            Number of snapshots to keep per country.
+
+        Returns:
+        --------
+        list
+            Paths removed from the catalog.
+        """
+        try:
+            removed = []
+            entries = self.snapshots()
+            for country, group in entries.groupby('country', sort=False):
+                kept = 0
+                seen_hashes = set()
+                for row in group.itertuples(index=False):
+                    if not os.path.exists(row.path):
+                        removed.append(row.path)
+                    elif kept >= keep or row.content_hash in seen_hashes:
+                        os.remove(row.path)
+                        removed.append(row.path)
+                    else:
+                        kept += 1
+                        seen_hashes.add(row.content_hash)
+
+            if removed:
+                with self._connect() as conn:
+                    conn.executemany("DELETE FROM snapshots WHERE path = ?", [(path,) for path in removed])
+                    conn.executemany("DELETE FROM demand_classes WHERE path = ?", [(path,) for path in removed])
+            self.logger.info(f"Catalog compacted: {len(removed)} snapshots removed.")
+            return removed
+
+        except Exception as e:
+            self.logger.error(f"Error compacting the catalog: {e}")
+            raise
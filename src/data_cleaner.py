@@ -1,13 +1,27 @@
+import numpy as np
 import pandas as pd
+from src.catalog import CleanedDataCatalog
+from src.series import SeriesCollection
 from utils.logger import setup_logging
 from datetime import datetime
 
 class DataCleaner:
-    def __init__(self):
+    def __init__(self, writer=None, catalog=None):
         """
         Initializes the DataCleaner class and sets up logging.
+
+        Parameters:
+        -----------
+        writer : BackgroundWriter, optional
+            Writer used to save cleaned data in the background. Data is written
+            synchronously when not provided.
+        catalog : CleanedDataCatalog, optional
+            Catalog in which saved snapshots are registered. Defaults to the
+            catalog in 'data/processed/'.
         """
         self.logger = setup_logging()
+        self.writer = writer
+        self.catalog = catalog if catalog is not None else CleanedDataCatalog()
 
     def add_missing_dates(self, data):
         """
@@ -104,11 +118,14 @@ class DataCleaner:
             # Ensure 'Date' is datetime
             data['Date'] = pd.to_datetime(data['Date'])
 
-            # Ensure all region and national columns are floats (assuming sales data might have decimals)
+            # Ensure all region and national columns are float32 (sales data might have decimals,
+            # float64 precision is not needed and doubles memory)
+            memory_before = data.memory_usage(deep=True).sum()
             region_columns = [col for col in data.columns if 'Region' in col or 'National' in col]
-            data[region_columns] = data[region_columns].astype(float)
+            data = data.astype({col: np.float32 for col in region_columns})
+            memory_after = data.memory_usage(deep=True).sum()
 
-            self.logger.info("Data types set successfully.")
+            self.logger.info(f"Data types set successfully. Memory: {memory_before} -> {memory_after} bytes.")
             return data
 
         except Exception as e:
@@ -131,7 +148,7 @@ class DataCleaner:
         """
         try:
             # Perform backward fill for all columns except 'Date'
-            data_filled = data.fillna(method='bfill', axis=0)
+            data_filled = data.bfill(axis=0)
 
             self.logger.info("Performed backward filling for all columns except 'Date'.")
             return data_filled
@@ -156,8 +173,66 @@ class DataCleaner:
         """
         data.columns = data.columns.str.lower().str.replace(' ', '_')
         return data
+
+    def to_series_collection(self, data, date_column='date'):
+        """
+        Converts cleaned data to the compact series representation
+        (float32 values, int32 date offsets and categorical series ids).
+
+        Parameters:
+        -----------
+        data : pd.DataFrame
+            The cleaned data with normalized column names.
+        date_column : str
+            Name of the date column.
+
+        Returns:
+        --------
+        SeriesCollection
+            The compact series collection.
+        """
+        try:
+            series = SeriesCollection.from_frame(data, date_column=date_column)
+            self.logger.info(f"Series collection built with {len(series.columns)} series and {len(series)} periods: "
+                             f"{series.nbytes} bytes (DataFrame: {data.memory_usage(deep=True).sum()} bytes).")
+            return series
+
+        except Exception as e:
+            self.logger.error(f"Error building series collection: {e}")
+            raise
     
-    def save_cleaned_data(self, data, country):
+    def classify_demand(self, series, zero_ratio=0.5):
+        """
+        Classifies every series by its share of zero-sales periods.
+
+        Parameters:
+        -----------
+        series : SeriesCollection
+            The cleaned series.
+        zero_ratio : float
+            Share of zero periods from which a series is 'intermittent'; the others are 'smooth'.
+
+        Returns:
+        --------
+        pd.DataFrame
+            One row per series with its zero_ratio and demand_class.
+        """
+        try:
+            ratios = (series.values == 0).mean(axis=0)
+            classes = pd.DataFrame({
+                'series': series.columns,
+                'zero_ratio': ratios,
+                'demand_class': np.where(ratios >= zero_ratio, 'intermittent', 'smooth'),
+            })
+            intermittent = list(classes.loc[classes['demand_class'] == 'intermittent', 'series'])
+            self.logger.info(f"{len(intermittent)} of {len(classes)} series classified as intermittent: {intermittent}")
+            return classes
+
+        except Exception as e:
+            self.logger.error(f"Error classifying demand: {e}")
+            raise
+
+    def save_cleaned_data(self, data, country, demand_classes=None):
         """
         Saves the cleaned data with a timestamp in the filename.
 
@@ -168,6 +243,9 @@ class DataCleaner:
 
         country : str
             The name of the country (used for file naming).
+
+        demand_classes : pd.DataFrame, optional
+            Demand class of every series, registered in the catalog with the snapshot.
         """
         try:
             # Get the current timestamp
@@ -179,14 +257,23 @@ class DataCleaner:
             # Define the path with the timestamped filename
             cleaned_data_path = f"data/processed/CleanedSales{normalized_country_name}_{timestamp}.xlsx"
 
-            # Save the cleaned data
-            data.to_excel(cleaned_data_path, index=False)
-            self.logger.info(f"Cleaned data saved at {cleaned_data_path}")
+            # Save the cleaned data (in the background when a writer is set) and register
+            # the snapshot in the catalog once it is on disk
+            if self.writer is not None:
+                self.writer.submit(self._write_snapshot, data, country, cleaned_data_path, demand_classes)
+                self.logger.info(f"Cleaned data queued for writing at {cleaned_data_path}")
+            else:
+                self._write_snapshot(data, country, cleaned_data_path, demand_classes)
+                self.logger.info(f"Cleaned data saved at {cleaned_data_path}")
 
         except Exception as e:
             self.logger.error(f"Error saving cleaned data for {country}: {e}")
             raise
 
+    def _write_snapshot(self, data, country, cleaned_data_path, demand_classes=None):
+        data.to_excel(cleaned_data_path, index=False)
+        self.catalog.register(country, cleaned_data_path, data, demand_classes=demand_classes)
+
 
 
 # Example Usage
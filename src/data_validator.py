@@ -0,0 +1,211 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from utils.logger import setup_logging
+
+DEFAULT_REPORT_DIR = 'data/validation'
+
+# Checks run on every series and the action taken by default when they fire
+CHECKS = {'negative': 'quarantine', 'spike': 'flag', 'stuck': 'flag', 'hierarchy': 'flag'}
+ACTIONS = ('off', 'flag', 'quarantine')
+
+
+class DataValidator:
+    """
+    Data-quality checks run on the cleaned series before any model is fitted.
+
+    Every check runs as column-wise NumPy operations over all series of a
+    country at once:
+
+    - negative: negative sales;
+    - spike: values further than `spike_z` robust standard deviations from
+      the median of their neighbours in a centered window of `spike_window` periods;
+    - stuck: the same non-zero value repeated for `stuck_periods` periods or more;
+    - hierarchy: periods where the regions do not sum up to the national
+      series within `hierarchy_tolerance` (relative).
+
+    Each check either flags the offending series in the report or quarantines
+    them: quarantined regions are removed before modelling, and a quarantined
+    national series stops the country.
+    """
+
+    def __init__(self, config):
+        """
+        Parameters:
+        -----------
+        config : dict
+            Configuration dictionary; checks are set in its 'validation' section.
+        """
+        self.config = config
+        self.logger = setup_logging()
+        validation_config = config.get('validation', {})
+        self.actions = {check: validation_config.get(check, action) for check, action in CHECKS.items()}
+        unknown = {action for action in self.actions.values() if action not in ACTIONS}
+        if unknown:
+            raise ValueError(f"Unknown validation actions {sorted(unknown)}. Available: {list(ACTIONS)}")
+        self.spike_z = validation_config.get('spike_z', 8.0)
+        self.spike_window = validation_config.get('spike_window', 5)
+        self.stuck_periods = validation_config.get('stuck_periods', 6)
+        self.hierarchy_tolerance = validation_config.get('hierarchy_tolerance', 0.01)
+        self.report_dir = validation_config.get('report_dir', DEFAULT_REPORT_DIR)
+
+    def negative_mask(self, values):
+        return values < 0
+
+    def spike_mask(self, values):
+        """
+        Flags values far from the median of their neighbours (the centered
+        rolling window without the value itself), scaled by the median
+        absolute deviation of every series.
+        """
+        half = self.spike_window // 2
+        padded = np.pad(values, ((half, half), (0, 0)), constant_values=np.nan)
+        windows = np.delete(sliding_window_view(padded, 2 * half + 1, axis=0), half, axis=-1)
+        with warnings.catch_warnings():
+            # All-NaN windows (e.g., gaps not filled yet) give NaN medians, never flagged
+            warnings.simplefilter('ignore', RuntimeWarning)
+            residuals = values - np.nanmedian(windows, axis=-1)
+            scale = 1.4826 * np.nanmedian(np.abs(residuals), axis=0)
+            return (scale > 0) & (np.abs(residuals) > self.spike_z * np.where(scale > 0, scale, 1.0))
+
+    def stuck_mask(self, values):
+        """
+        Flags the periods of runs of at least `stuck_periods` identical non-zero values.
+        """
+        n_rows = len(values)
+        if n_rows < 2:
+            return np.zeros(values.shape, dtype=bool)
+        same = np.vstack([np.zeros((1, values.shape[1]), dtype=bool), values[1:] == values[:-1]]) & (values != 0)
+        # Length of the run ending at every row: row index minus the index of the last change
+        rows = np.arange(n_rows)[:, None]
+        run_start = np.maximum.accumulate(np.where(same, 0, rows), axis=0)
+        run_length = rows - run_start + 1
+        # Flag the whole run, not only its end: propagate the run lengths backwards from the run ends
+        run_end = np.vstack([~same[1:], np.ones((1, values.shape[1]), dtype=bool)])
+        end_length = np.where(run_end, run_length, 0)
+        full_length = np.flip(_backward_fill_nonzero(np.flip(end_length, axis=0)), axis=0)
+        return full_length >= self.stuck_periods
+
+    def hierarchy_mask(self, regions, national):
+        """
+        Flags the periods where the regions do not add up to the national series.
+        """
+        total = regions.sum(axis=1)
+        complete = ~(np.isnan(regions).any(axis=1) | np.isnan(national))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative = np.abs(total - national) / np.maximum(np.abs(national), np.finfo(np.float32).eps)
+        return complete & (relative > self.hierarchy_tolerance)
+
+    def validate(self, series, country, national_column='national', region_prefix='region'):
+        """
+        Runs every enabled check over all series of a country.
+
+        Parameters:
+        -----------
+        series : SeriesCollection
+            Cleaned series of the country (before gaps are filled).
+        country : str
+            Country key from the config file.
+        national_column : str
+            Series id of the national sales.
+        region_prefix : str
+            Prefix of the regional series ids.
+
+        Returns:
+        --------
+        pd.DataFrame
+            One row per (series, check) that fired with the number of flagged
+            periods, the first and last flagged dates and the action taken.
+        """
+        try:
+            values = series.values.astype(np.float64)
+            dates = series.dates
+            masks = {}
+            if self.actions['negative'] != 'off':
+                masks['negative'] = self.negative_mask(values)
+            if self.actions['spike'] != 'off':
+                masks['spike'] = self.spike_mask(values)
+            if self.actions['stuck'] != 'off':
+                masks['stuck'] = self.stuck_mask(values)
+
+            regions = [i for i, name in enumerate(series.columns) if name.startswith(region_prefix)]
+            if self.actions['hierarchy'] != 'off' and regions and national_column in series:
+                national_index = series.columns.index(national_column)
+                mismatch = self.hierarchy_mask(values[:, regions], values[:, national_index])
+                # A hierarchy mismatch is reported on the national series
+                masks['hierarchy'] = np.zeros(values.shape, dtype=bool)
+                masks['hierarchy'][:, national_index] = mismatch
+
+            rows = []
+            for check, mask in masks.items():
+                counts = mask.sum(axis=0)
+                for i in np.flatnonzero(counts):
+                    flagged_dates = dates[mask[:, i]]
+                    rows.append({'country': country, 'series': series.columns[i], 'check': check,
+                                 'n_flagged': int(counts[i]), 'first_flagged': flagged_dates.min(),
+                                 'last_flagged': flagged_dates.max(), 'action': self.actions[check]})
+            report = pd.DataFrame(rows, columns=['country', 'series', 'check', 'n_flagged', 'first_flagged',
+                                                 'last_flagged', 'action'])
+
+            for row in report.itertuples(index=False):
+                self.logger.warning(f"Validation check '{row.check}' fired for {row.series} in {country}: "
+                                    f"{row.n_flagged} periods between {row.first_flagged.date()} and "
+                                    f"{row.last_flagged.date()} ({row.action}).")
+            if report.empty:
+                self.logger.info(f"All validation checks passed for {country}.")
+            return report
+
+        except Exception as e:
+            self.logger.error(f"Error validating data for {country}: {e}")
+            raise
+
+    def quarantined(self, report):
+        """
+        Returns the series quarantined by a report.
+        """
+        return sorted(report.loc[report['action'] == 'quarantine', 'series'].unique())
+
+    def apply(self, data, report, country, national_column='national'):
+        """
+        Removes the quarantined series from the cleaned data.
+
+        Raises:
+        -------
+        ValueError
+            If the national series is quarantined, since no forecast of the
+            country can be made without it.
+        """
+        quarantined = self.quarantined(report)
+        if national_column in quarantined:
+            self.logger.error(f"National series of {country} quarantined by the validation checks.")
+            raise ValueError(f"National series of {country} failed validation: "
+                             f"{sorted(report.loc[report['series'] == national_column, 'check'])}")
+        if quarantined:
+            self.logger.warning(f"Series quarantined in {country}, excluded from modelling: {quarantined}")
+        return data.drop(columns=quarantined)
+
+    def save_report(self, report, country, run_id):
+        """
+        Saves the validation report of a country under the folder of the run.
+
+        Returns:
+        --------
+        str
+            Path of the report.
+        """
+        report_path = os.path.join(self.report_dir, run_id, f"validation_{country}.csv")
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        report.to_csv(report_path, index=False)
+        self.logger.info(f"Validation report saved at {report_path}")
+        return report_path
+
+
+def _backward_fill_nonzero(values):
+    """
+    Replaces zeros by the previous non-zero value of the column (rows in order).
+    """
+    rows = np.arange(len(values))[:, None]
+    last = np.maximum.accumulate(np.where(values != 0, rows, 0), axis=0)
+    return np.take_along_axis(values, last, axis=0)
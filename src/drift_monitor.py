@@ -0,0 +1,258 @@
+import os
+import hashlib
+import sqlite3
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from datetime import datetime
+from utils.logger import setup_logging
+
+DEFAULT_STATE_PATH = 'models/saved_models/model_state.sqlite'
+
+
+class ModelStateStore:
+    """
+    SQLite store of the training state of every fitted series: when it was
+    trained, the last date it was trained on, its train MAPE, the mean and
+    standard deviation of its training values and the signature of the
+    features it was trained on. The drift monitor compares new
+    data against this state to decide which series need retraining.
+    """
+
+    COLUMNS = ['trained_at', 'last_date', 'train_mape', 'mean', 'std', 'features']
+
+    def __init__(self, state_path=DEFAULT_STATE_PATH):
+        """
+        Parameters:
+        -----------
+        state_path : str
+            Path of the SQLite state file.
+        """
+        self.state_path = state_path
+        self.logger = setup_logging()
+        os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS series_state (
+                    engine TEXT NOT NULL,
+                    country TEXT NOT NULL,
+                    series TEXT NOT NULL,
+                    trained_at TEXT NOT NULL,
+                    last_date TEXT NOT NULL,
+                    train_mape REAL,
+                    mean REAL,
+                    std REAL,
+                    features TEXT,
+                    PRIMARY KEY (engine, country, series)
+                )""")
+            # State files written before feature signatures were recorded
+            if 'features' not in [row[1] for row in conn.execute("PRAGMA table_info(series_state)")]:
+                conn.execute("ALTER TABLE series_state ADD COLUMN features TEXT")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.state_path, timeout=30)
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def load(self, engine, country):
+        """
+        Returns the state of every series of an engine and country.
+
+        Returns:
+        --------
+        pd.DataFrame
+            One row per series (index) with the `COLUMNS` of the state.
+        """
+        with self._connect() as conn:
+            state = pd.read_sql_query(
+                "SELECT series, " + ', '.join(self.COLUMNS) + " FROM series_state WHERE engine = ? AND country = ?",
+                conn, params=[engine, country], index_col='series')
+        state['trained_at'] = pd.to_datetime(state['trained_at'])
+        state['last_date'] = pd.to_datetime(state['last_date'])
+        return state
+
+    def update(self, engine, country, state):
+        """
+        Records the state of freshly trained series, replacing their previous state.
+
+        Parameters:
+        -----------
+        engine : str
+            Name of the engine.
+        country : str
+            Country key from the config file.
+        state : pd.DataFrame
+            One row per series (index) with the `COLUMNS` of the state.
+        """
+        try:
+            rows = [(engine, country, str(series), pd.Timestamp(row.trained_at).isoformat(timespec='seconds'),
+                     pd.Timestamp(row.last_date).date().isoformat(), float(row.train_mape), float(row.mean),
+                     float(row.std), row.features)
+                    for series, row in zip(state.index, state.itertuples(index=False))]
+            with self._connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO series_state (engine, country, series, "
+                                 + ', '.join(self.COLUMNS) + ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+        except Exception as e:
+            self.logger.error(f"Error updating the model state of {engine} in {country}: {e}")
+            raise
+
+
+class DriftMonitor:
+    """
+    Decides which series have to be retrained after new weeks were ingested.
+
+    A series is retrained when it has no stored model, when it was trained on
+    a different feature set, when its model is older than `max_age_days`, when the MAPE of its stored model on the new weeks
+    exceeds `mape_ratio` times its train MAPE (and at least `min_mape`), or
+    when the mean of the new weeks moved more than `drift_z` training standard
+    deviations away from the training mean. All checks run as column-wise NumPy
+    operations over every series at once.
+    """
+
+    def __init__(self, mape_ratio=1.5, min_mape=0.1, drift_z=3.0, max_age_days=28):
+        self.mape_ratio = mape_ratio
+        self.min_mape = min_mape
+        self.drift_z = drift_z
+        self.max_age_days = max_age_days
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Builds the monitor from the 'retraining' section of the config.
+        """
+        retraining_config = config.get('retraining', {})
+        return cls(**{key: retraining_config[key] for key in ('mape_ratio', 'min_mape', 'drift_z', 'max_age_days')
+                      if key in retraining_config})
+
+    @staticmethod
+    def feature_signature(feature_names):
+        """
+        Returns a short signature of a feature set; models trained on another set cannot be reused.
+        """
+        return hashlib.sha256(','.join(feature_names).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def training_state(Y, predictions, trained_at=None, features=None):
+        """
+        Computes the state of freshly trained series from their in-sample predictions.
+
+        Parameters:
+        -----------
+        Y : SeriesCollection
+            Training targets.
+        predictions : SeriesCollection
+            In-sample predictions of the trained series.
+        trained_at : datetime, optional
+            Training time. Defaults to now.
+        features : str, optional
+            Signature of the features the series were trained on (see `feature_signature`).
+
+        Returns:
+        --------
+        pd.DataFrame
+            One row per series with the `ModelStateStore.COLUMNS`.
+        """
+        actual = Y.values.astype(float)
+        predicted = predictions.select(Y.columns).values.astype(float)
+        return pd.DataFrame({
+            'trained_at': pd.Timestamp(trained_at or datetime.now()),
+            'last_date': Y.dates.max(),
+            'train_mape': _mape(actual, predicted, np.ones(actual.shape, dtype=bool)),
+            'mean': actual.mean(axis=0),
+            'std': actual.std(axis=0),
+            'features': features,
+        }, index=pd.Index(Y.columns, name='series'))
+
+    def new_rows(self, Y, state):
+        """
+        Returns the mask of the rows after the earliest last training date of the series (None without state).
+        """
+        known = state['last_date'].reindex(Y.columns).dropna()
+        if known.empty:
+            return None
+        return np.asarray(Y.dates > known.min())
+
+    def check(self, Y, state, predictions=None, now=None, features=None):
+        """
+        Returns the series to retrain with the reason of each.
+
+        Parameters:
+        -----------
+        Y : SeriesCollection
+            All targets of the country, including the new weeks.
+        state : pd.DataFrame
+            Stored state of the series (see `ModelStateStore.load`).
+        predictions : SeriesCollection, optional
+            Predictions of the stored models for the rows selected by `new_rows`.
+        now : datetime, optional
+            Reference time for the model age. Defaults to now.
+        features : str, optional
+            Signature of the current features. Series trained on other features are retrained.
+
+        Returns:
+        --------
+        dict
+            {series: reason} for every series to retrain.
+        """
+        state = state.reindex(Y.columns)
+        now = pd.Timestamp(now or datetime.now())
+        reasons = {}
+
+        missing = state['trained_at'].isna().to_numpy()
+        age_days = (now - state['trained_at']).dt.days.to_numpy()
+        stale = ~missing & (age_days > self.max_age_days)
+        changed = np.zeros(len(Y.columns), dtype=bool)
+        if features is not None:
+            changed = ~missing & (state['features'].to_numpy() != features)
+
+        breached = np.zeros(len(Y.columns), dtype=bool)
+        drifted = np.zeros(len(Y.columns), dtype=bool)
+        rolling_mape = np.full(len(Y.columns), np.nan)
+        rows = self.new_rows(Y, state)
+        if predictions is not None and rows is not None and rows.any():
+            actual = Y.values[rows].astype(float)
+            # Series without a stored model have no predictions
+            predicted = np.column_stack([
+                np.asarray(predictions[series], dtype=float) if series in predictions else np.full(len(actual), np.nan)
+                for series in Y.columns
+            ])
+            # Only the weeks after each series' own last training date count as new
+            new = np.asarray(Y.dates[rows])[:, None] > state['last_date'].to_numpy()[None, :]
+            has_new = new.any(axis=0) & ~missing
+
+            rolling_mape = _mape(actual, predicted, new)
+            threshold = np.maximum(state['train_mape'].to_numpy() * self.mape_ratio, self.min_mape)
+            breached = has_new & (rolling_mape > threshold)
+
+            n_new = np.maximum(new.sum(axis=0), 1)
+            new_mean = np.where(new, actual, 0.0).sum(axis=0) / n_new
+            std = np.maximum(state['std'].to_numpy(), np.finfo(float).eps)
+            drifted = has_new & (np.abs(new_mean - state['mean'].to_numpy()) / std > self.drift_z)
+
+        for i, series in enumerate(Y.columns):
+            if missing[i]:
+                reasons[series] = 'no stored model'
+            elif changed[i]:
+                reasons[series] = "feature set changed"
+            elif stale[i]:
+                reasons[series] = f"model is {age_days[i]} days old"
+            elif breached[i]:
+                reasons[series] = f"MAPE on new weeks {rolling_mape[i]:.4f} above threshold"
+            elif drifted[i]:
+                reasons[series] = "mean of new weeks drifted from training data"
+        return reasons
+
+
+def _mape(actual, predicted, mask):
+    """
+    Column-wise MAPE over the masked rows, ignoring zero actuals.
+    """
+    valid = mask & (actual != 0)
+    errors = np.abs(actual - predicted) / np.where(valid, np.abs(actual), 1.0)
+    counts = valid.sum(axis=0)
+    return np.where(counts > 0, np.where(valid, errors, 0.0).sum(axis=0) / np.maximum(counts, 1), np.nan)
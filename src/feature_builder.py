@@ -0,0 +1,218 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+from src.calendar_cache import calendar_cache
+from src.series import FeatureMatrix, SeriesCollection
+from utils.logger import setup_logging
+
+ROLLING_STATS = ('mean', 'std', 'min', 'max')
+
+
+def rolling_mean_std(values, window):
+    """
+    Rolling mean and sample standard deviation of every column over `window`
+    rows, computed in O(n) from cumulative sums.
+
+    Parameters:
+    -----------
+    values : np.ndarray
+        Array of shape (n_rows, n_series).
+    window : int
+        Number of rows of the window.
+
+    Returns:
+    --------
+    tuple
+        (mean, std) arrays of the same shape as values, NaN until the window is full.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    zeros = np.zeros((1,) + values.shape[1:])
+    cumsum = np.concatenate([zeros, np.cumsum(values, axis=0)])
+    cumsum_sq = np.concatenate([zeros, np.cumsum(values ** 2, axis=0)])
+
+    mean = np.full(values.shape, np.nan)
+    std = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        window_sum = cumsum[window:] - cumsum[:-window]
+        window_sum_sq = cumsum_sq[window:] - cumsum_sq[:-window]
+        mean[window - 1:] = window_sum / window
+        if window > 1:
+            variance = (window_sum_sq - window_sum ** 2 / window) / (window - 1)
+            std[window - 1:] = np.sqrt(np.maximum(variance, 0.0))
+    return mean, std
+
+
+def rolling_extremum(values, window, stat):
+    """
+    Rolling 'min' or 'max' of every column over `window` rows, computed on a
+    strided (zero-copy) window view.
+
+    Returns:
+    --------
+    np.ndarray
+        Array of the same shape as values, NaN until the window is full.
+    """
+    result = np.full(np.shape(values), np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window, axis=0)
+        result[window - 1:] = windows.min(axis=-1) if stat == 'min' else windows.max(axis=-1)
+    return result
+
+
+def ewma(values, alpha):
+    """
+    Exponentially weighted moving average of every column
+    (y[t] = alpha * x[t] + (1 - alpha) * y[t-1], starting at y[0] = x[0]),
+    computed as a single linear filter over all columns.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values.copy()
+    return lfilter([alpha], [1.0, alpha - 1.0], values, axis=0, zi=(1 - alpha) * values[:1])[0]
+
+
+class FeatureBuilder:
+    def __init__(self, config):
+        """
+        Initializes the FeatureBuilder with the configuration.
+
+        Parameters:
+        -----------
+        config : dict
+            Configuration dictionary loaded from the config file.
+        """
+        self.config = config
+        self.logger = setup_logging()
+
+    def build(self, series, region_columns, national_column, num_lags, feature_config=None):
+        """
+        Builds the regional feature matrix and aligned targets from a series collection.
+
+        Features are the non-regional series (e.g., national sales and the national
+        forecast), `num_lags` lags of every region, the window and calendar features
+        of `feature_config` and a copy of the national column as 'National_forecast'.
+        Rows with missing values (e.g., the first `num_lags` rows) are dropped.
+
+        Parameters:
+        -----------
+        series : SeriesCollection
+            Collection containing regional sales, national sales and the national forecast.
+        region_columns : list
+            List of regional sales series ids (the targets).
+        national_column : str
+            Series id of the national sales.
+        num_lags : int
+            Number of lagged features to create per region.
+        feature_config : dict, optional
+            The country's 'features' section of the config:
+            rolling_windows (e.g., [4, 12]) with rolling_stats (any of 'mean', 'std',
+            'min', 'max'), ewma_alphas (e.g., [0.3]), week_of_year (bool) and
+            holidays (country code for holiday flags, e.g., 'US').
+
+        Returns:
+        --------
+        tuple
+            (X, Y) where X is a FeatureMatrix and Y a SeriesCollection of the regions.
+        """
+        try:
+            feature_config = feature_config or {}
+            base_columns = [col for col in series.columns if col not in region_columns]
+            targets = series.select(region_columns).values
+            n_rows = len(series)
+
+            feature_names = list(base_columns)
+            blocks = [series.select(base_columns).values] if base_columns else []
+
+            lags = np.full((n_rows, len(region_columns) * num_lags), np.nan, dtype=np.float32)
+            col = 0
+            for r, region in enumerate(region_columns):
+                for lag in range(1, num_lags + 1):
+                    lags[lag:, col] = targets[:-lag, r]
+                    feature_names.append(f'{region}_lag{lag}')
+                    col += 1
+            blocks.append(lags)
+
+            for names, block in (self.window_features(targets, region_columns, feature_config),
+                                 self.calendar_features(series, feature_config)):
+                feature_names += names
+                blocks.append(block)
+
+            feature_names.append('National_forecast')
+            blocks.append(series[national_column].reshape(-1, 1))
+            features = np.concatenate(blocks, axis=1).astype(np.float32, copy=False)
+
+            # Drop rows with NaN values resulting from lagging and incomplete windows
+            valid = ~(np.isnan(features).any(axis=1) | np.isnan(targets).any(axis=1))
+            X = FeatureMatrix(features[valid], feature_names, series.date_offsets[valid], series.start)
+            Y = SeriesCollection(targets[valid], series.date_offsets[valid], series.start, region_columns)
+
+            # float64 frame with the same shape is what the features used to be built as
+            float64_bytes = X.values.size * 8 + Y.values.size * 8
+            self.logger.info(f"Feature matrix built with {X.values.shape[1]} features for {X.values.shape[0]} rows: "
+                             f"{X.nbytes + Y.nbytes} bytes (float64 frame: {float64_bytes} bytes).")
+            return X, Y
+
+        except Exception as e:
+            self.logger.error(f"Error building features: {e}")
+            raise
+
+    def window_features(self, targets, region_columns, feature_config):
+        """
+        Computes the rolling and EWMA features of every region at once. Features
+        of row t only use the values up to t - 1.
+
+        Returns:
+        --------
+        tuple
+            (feature names, float32 array of shape (n_rows, n_features)).
+        """
+        stats = feature_config.get('rolling_stats', ['mean'])
+        unknown = set(stats) - set(ROLLING_STATS)
+        if unknown:
+            raise ValueError(f"Unknown rolling statistics {sorted(unknown)}. Available: {list(ROLLING_STATS)}")
+
+        names, columns = [], []
+        for window in feature_config.get('rolling_windows', []):
+            computed = {}
+            if 'mean' in stats or 'std' in stats:
+                computed['mean'], computed['std'] = rolling_mean_std(targets, window)
+            for stat in stats:
+                if stat in ('min', 'max'):
+                    computed[stat] = rolling_extremum(targets, window, stat)
+                names += [f'{region}_roll{window}_{stat}' for region in region_columns]
+                columns.append(computed[stat])
+        for alpha in feature_config.get('ewma_alphas', []):
+            names += [f'{region}_ewma{alpha:g}' for region in region_columns]
+            columns.append(ewma(targets, alpha))
+
+        block = np.full((len(targets), len(names)), np.nan, dtype=np.float32)
+        if columns:
+            # Shift by one period so that the current value is not part of its own feature
+            block[1:] = np.concatenate(columns, axis=1)[:-1]
+        return names, block
+
+    def calendar_features(self, series, feature_config):
+        """
+        Returns the week-of-year and holiday features of the rows, taken from the
+        calendar cache shared by every country with the same weeks.
+
+        Returns:
+        --------
+        tuple
+            (feature names, float32 array of shape (n_rows, n_features)).
+        """
+        names, columns = [], []
+        start, periods = series.dates[0] if len(series) else None, len(series)
+        # The cache covers regular W-MON ranges; irregular dates are computed directly
+        regular = periods > 0 and start.dayofweek == 0 and np.all(np.diff(series.date_offsets) == 7)
+        if feature_config.get('week_of_year', False):
+            names.append('week_of_year')
+            columns.append(calendar_cache.week_of_year(start, periods, 'W-MON') if regular
+                           else series.dates.isocalendar().week.to_numpy())
+        if feature_config.get('holidays'):
+            if not regular:
+                raise ValueError("Holiday flags require regular weekly dates.")
+            names.append('holiday')
+            columns.append(calendar_cache.holiday_flags(start, periods, 'W-MON', feature_config['holidays']))
+        block = np.column_stack(columns).astype(np.float32) if columns else np.empty((periods, 0), dtype=np.float32)
+        return names, block
@@ -0,0 +1,174 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from datetime import datetime
+from urllib.parse import unquote
+from src.series import quantile_column
+from utils.logger import setup_logging
+
+DEFAULT_FORECAST_STORE = 'data/forecasts/store'
+
+# Columns partitioning the dataset on disk (country=.../level=.../<run_id>-0.parquet)
+PARTITION_COLUMNS = ['country', 'level']
+
+
+def new_run_id():
+    """
+    Returns the id of a new pipeline run (its start time, e.g. '20240101T060000').
+    """
+    return datetime.now().strftime('%Y%m%dT%H%M%S')
+
+
+class ForecastStore:
+    """
+    Consolidated long-format forecast table stored as a Parquet dataset
+    partitioned by country and level. Every run appends one file per
+    partition, so the forecast history is kept and downstream tools scan a
+    single dataset instead of one workbook per country and model.
+
+    Columns: run_id, country, level, series, date, horizon, value and one
+    column per configured quantile (e.g., 'value_p10'). Files written with
+    other quantiles are read with the missing quantile columns as NaN.
+    """
+
+    def __init__(self, root=DEFAULT_FORECAST_STORE, quantiles=()):
+        """
+        Parameters:
+        -----------
+        root : str
+            Folder of the Parquet dataset.
+        quantiles : list
+            Quantile levels stored next to the point forecast.
+        """
+        self.root = root
+        self.logger = setup_logging()
+        self.quantile_columns = [quantile_column('value', quantile) for quantile in sorted(quantiles)]
+        self.schema = pa.schema(
+            [('run_id', pa.string()), ('series', pa.string()), ('date', pa.timestamp('ms')),
+             ('horizon', pa.int16()), ('value', pa.float32())]
+            + [(column, pa.float32()) for column in self.quantile_columns]
+            + [(column, pa.string()) for column in PARTITION_COLUMNS])
+
+    @staticmethod
+    def to_long(run_id, country, level, predictions, quantiles=None):
+        """
+        Converts wide forecasts to the long format of the store.
+
+        Parameters:
+        -----------
+        run_id : str
+            Id of the run that produced the forecasts.
+        country : str
+            Country key from the config file.
+        level : str
+            Hierarchy level of the series ('national' or 'regional').
+        predictions : SeriesCollection
+            Point forecasts of the future periods, one series per column.
+        quantiles : dict, optional
+            {quantile level: SeriesCollection} of quantile forecasts aligned with `predictions`.
+
+        Returns:
+        --------
+        pd.DataFrame
+            One row per (series, date).
+        """
+        n_periods, n_series = predictions.values.shape
+        frame = pd.DataFrame({
+            'run_id': run_id,
+            'country': country,
+            'level': level,
+            'series': np.repeat(np.asarray(predictions.columns, dtype=object), n_periods),
+            'date': np.tile(predictions.dates.to_numpy(), n_series),
+            'horizon': np.tile(np.arange(1, n_periods + 1, dtype=np.int16), n_series),
+            # Column-major ravel keeps every series' periods together
+            'value': predictions.values.ravel(order='F'),
+        })
+        for quantile, values in (quantiles or {}).items():
+            frame[quantile_column('value', quantile)] = values.select(predictions.columns).values.ravel(order='F')
+        return frame
+
+    def append(self, frame):
+        """
+        Appends the forecasts of a run. Rewriting the same run for a country and
+        level replaces its previous file, so retried tasks do not duplicate rows.
+
+        Parameters:
+        -----------
+        frame : pd.DataFrame
+            Forecasts in the long format (see `to_long`) of a single run.
+        """
+        try:
+            run_ids = frame['run_id'].unique()
+            if len(run_ids) != 1:
+                raise ValueError(f"Forecasts of exactly one run can be appended at a time, got {list(run_ids)}")
+
+            frame = frame.reindex(columns=self.schema.names)
+            table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+            ds.write_dataset(table, self.root, format='parquet', partitioning=PARTITION_COLUMNS,
+                             partitioning_flavor='hive', basename_template=f"{run_ids[0]}-{{i}}.parquet",
+                             existing_data_behavior='overwrite_or_ignore')
+            self.logger.info(f"{len(frame)} forecast rows of run {run_ids[0]} appended to {self.root}")
+
+        except Exception as e:
+            self.logger.error(f"Error appending forecasts to {self.root}: {e}")
+            raise
+
+    def dataset(self):
+        """
+        Returns the pyarrow dataset of the store (e.g., for custom scans).
+        """
+        return ds.dataset(self.root, schema=self.schema, format='parquet', partitioning='hive')
+
+    def runs(self):
+        """
+        Lists the stored runs of every country and level from the file names,
+        without reading any forecast.
+
+        Returns:
+        --------
+        pd.DataFrame
+            One row per (run_id, country, level).
+        """
+        columns = ['run_id'] + PARTITION_COLUMNS
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=columns)
+
+        rows = []
+        for path in self.dataset().files:
+            *partitions, name = os.path.relpath(path, self.root).split(os.sep)
+            values = dict(partition.split('=', 1) for partition in partitions)
+            rows.append([name.rsplit('-', 1)[0]] + [unquote(values[column]) for column in PARTITION_COLUMNS])
+        return pd.DataFrame(rows, columns=columns).drop_duplicates(ignore_index=True)
+
+    def read(self, columns=None, since=None, **filters):
+        """
+        Reads forecasts from the store, only loading the requested columns and
+        the partitions and row groups matching the filters.
+
+        Parameters:
+        -----------
+        columns : list, optional
+            Columns to load. Defaults to every column.
+        since : str or datetime, optional
+            Only load forecasts dated on or after this date.
+        **filters :
+            Column values to keep, e.g. `country='country_1'` or `run_id=['a', 'b']`.
+
+        Returns:
+        --------
+        pd.DataFrame
+            The matching forecasts.
+        """
+        if not os.path.isdir(self.root):
+            return pd.DataFrame({name: pd.Series(dtype=object) for name in (columns or self.schema.names)})
+
+        expression = None
+        if since is not None:
+            expression = ds.field('date') >= pa.scalar(pd.Timestamp(since), type=pa.timestamp('ms'))
+        for column, value in filters.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            condition = ds.field(column).isin(list(values))
+            expression = condition if expression is None else expression & condition
+        return self.dataset().to_table(columns=columns, filter=expression).to_pandas()
@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import socket
+import hashlib
+import sqlite3
+import pandas as pd
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from datetime import datetime
+from utils.executors import SerialExecutor
+from utils.logger import setup_logging
+
+DEFAULT_PIPELINE_STATE_PATH = 'data/pipeline_state.sqlite'
+
+
+class Task:
+    """
+    Unit of work of the pipeline, identified by (stage, country, region).
+
+    `func` must be a picklable module-level function called as `func(*args)`.
+    `inputs` is any JSON-serializable description of what the task reads (e.g.,
+    input file stamps and the relevant config); together with the fingerprints of
+    its dependencies it decides whether a completed task is still valid.
+    `outputs` are files that must still exist for the task to count as done, and
+    `check`, when given, is called with `args` and returns whether the outputs of
+    a completed task are still available (e.g., for outputs with dated names).
+    """
+
+    def __init__(self, stage, country, func, args=(), deps=(), inputs=None, outputs=(), check=None, region=''):
+        self.stage = stage
+        self.country = country
+        self.region = region
+        self.func = func
+        self.args = tuple(args)
+        self.deps = list(deps)
+        self.inputs = inputs
+        self.outputs = list(outputs)
+        self.check = check
+
+    @property
+    def key(self):
+        return (self.stage, self.country, self.region)
+
+    def outputs_exist(self):
+        """
+        Returns whether the outputs of the task are still available.
+        """
+        return all(os.path.exists(path) for path in self.outputs) and (self.check is None or self.check(*self.args))
+
+    def __repr__(self):
+        return '/'.join(part for part in self.key if part)
+
+
+def file_stamp(path):
+    """
+    Returns a cheap fingerprint of an input file (path, size and modification time).
+    """
+    if not os.path.exists(path):
+        return [path, None, None]
+    stat = os.stat(path)
+    return [path, stat.st_size, stat.st_mtime_ns]
+
+
+class TaskStateStore:
+    """
+    SQLite store of the completion state of every pipeline task: its status
+    ('done' or 'failed'), the fingerprint it completed with, the worker that
+    ran it and the error of the last failure.
+    """
+
+    def __init__(self, state_path=DEFAULT_PIPELINE_STATE_PATH):
+        """
+        Parameters:
+        -----------
+        state_path : str
+            Path of the SQLite state file.
+        """
+        self.state_path = state_path
+        self.logger = setup_logging()
+        os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    stage TEXT NOT NULL,
+                    country TEXT NOT NULL,
+                    region TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    fingerprint TEXT,
+                    updated_at TEXT NOT NULL,
+                    error TEXT,
+                    worker TEXT,
+                    PRIMARY KEY (stage, country, region)
+                )""")
+            # State files written before tasks were distributed have no worker column
+            if 'worker' not in [row[1] for row in conn.execute("PRAGMA table_info(tasks)")]:
+                conn.execute("ALTER TABLE tasks ADD COLUMN worker TEXT")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.state_path, timeout=30)
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """
+        Returns (status, fingerprint) of a task, or None if it never ran.
+        """
+        with self._connect() as conn:
+            return conn.execute("SELECT status, fingerprint FROM tasks WHERE stage = ? AND country = ? AND region = ?",
+                                key).fetchone()
+
+    def set(self, key, status, fingerprint=None, error=None, worker=None):
+        """
+        Records the status of a task.
+        """
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO tasks (stage, country, region, status, fingerprint, updated_at, "
+                         "error, worker) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (*key, status, fingerprint, datetime.now().isoformat(timespec='seconds'), error, worker))
+
+    def invalidate(self, stage=None, country=None):
+        """
+        Forgets the state of the matching tasks so that the next run executes them again.
+
+        Returns:
+        --------
+        int
+            Number of invalidated tasks.
+        """
+        query, params = "DELETE FROM tasks WHERE 1 = 1", []
+        if stage is not None:
+            query += " AND stage = ?"
+            params.append(stage)
+        if country is not None:
+            query += " AND country = ?"
+            params.append(country)
+        with self._connect() as conn:
+            return conn.execute(query, params).rowcount
+
+    def tasks(self):
+        """
+        Returns the state of every task as a DataFrame.
+        """
+        with self._connect() as conn:
+            return pd.read_sql_query("SELECT * FROM tasks ORDER BY stage, country, region", conn)
+
+
+def run_task(func, args):
+    """
+    Runs a task function on a worker and returns where and how long it ran.
+    Module-level so that it can be shipped to process pools and clusters.
+    """
+    start_time = time.time()
+    func(*args)
+    return {'worker': f"{socket.gethostname()}:{os.getpid()}", 'seconds': time.time() - start_time}
+
+
+class PipelineRunner:
+    """
+    Runs a DAG of tasks with checkpointing. Completed tasks are skipped on the
+    next run unless their inputs, a dependency or one of their outputs changed;
+    a failed task only blocks the tasks depending on it, so one country failing
+    does not stop the others.
+
+    Tasks whose dependencies are complete are submitted to the executor
+    together, so independent countries and stages run concurrently with a
+    thread, process, Dask or Ray executor (see `utils.executors`). Workers
+    write their artifacts to the same data and model folders as the driver,
+    which records the state of every task in the store.
+    """
+
+    def __init__(self, store, executor=None):
+        """
+        Parameters:
+        -----------
+        store : TaskStateStore
+            Store of the task states.
+        executor : executor, optional
+            `concurrent.futures`-style executor the tasks are submitted to.
+            Tasks run one at a time in the calling thread when not provided.
+        """
+        self.store = store
+        self.executor = executor if executor is not None else SerialExecutor()
+        self.logger = setup_logging()
+
+    def _fingerprint(self, task, fingerprints):
+        payload = json.dumps([task.inputs, [fingerprints[dep.key] for dep in task.deps]], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _start(self, task, statuses, fingerprints, running):
+        """
+        Skips, blocks or submits a task whose dependencies are all finished.
+        """
+        if any(statuses[dep.key] not in ('done', 'skipped') for dep in task.deps):
+            statuses[task.key] = 'blocked'
+            self.logger.warning(f"Task {task} not run: a dependency did not complete.")
+            return
+
+        fingerprint = self._fingerprint(task, fingerprints)
+        fingerprints[task.key] = fingerprint
+        if self.store.get(task.key) == ('done', fingerprint) and task.outputs_exist():
+            statuses[task.key] = 'skipped'
+            self.logger.info(f"Task {task} is up to date. Skipping.")
+            return
+
+        self.logger.info(f"Running task {task}...")
+        running[self.executor.submit(run_task, task.func, task.args)] = task
+
+    def _finish(self, future, task, statuses, fingerprints):
+        """
+        Records the outcome of a submitted task.
+        """
+        try:
+            result = future.result()
+            self.store.set(task.key, 'done', fingerprints[task.key], worker=result['worker'])
+            statuses[task.key] = 'done'
+            self.logger.info(f"Task {task} completed on {result['worker']} in {result['seconds']:.2f} seconds.")
+
+        except Exception as e:
+            self.store.set(task.key, 'failed', fingerprints[task.key], error=str(e))
+            statuses[task.key] = 'failed'
+            self.logger.error(f"Task {task} failed: {e}")
+
+    def run(self, tasks):
+        """
+        Runs the tasks, each one as soon as its dependencies are finished.
+
+        Parameters:
+        -----------
+        tasks : list
+            Tasks of the pipeline. Every task must come after its dependencies.
+
+        Returns:
+        --------
+        dict
+            {task key: status} with status 'done', 'skipped' (still valid from a
+            previous run), 'failed' or 'blocked' (a dependency failed).
+        """
+        statuses = {}
+        fingerprints = {}
+        running = {}
+        waiting = list(tasks)
+        while waiting or running:
+            # Start every task whose dependencies are finished, in the given order
+            still_waiting = []
+            for task in waiting:
+                if all(dep.key in statuses for dep in task.deps):
+                    self._start(task, statuses, fingerprints, running)
+                else:
+                    still_waiting.append(task)
+            waiting = still_waiting
+
+            if running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(future, running.pop(future), statuses, fingerprints)
+            elif waiting:
+                raise ValueError(f"Tasks {waiting} depend on tasks that are not part of the pipeline.")
+
+        return statuses
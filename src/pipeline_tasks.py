@@ -0,0 +1,126 @@
+import os
+from models.registry import get_engine, load_engine_modules
+from src.catalog import CleanedDataCatalog, DEFAULT_CATALOG_PATH
+from src.data_cleaner import DataCleaner
+from src.data_loader import DataLoader
+from src.data_validator import DataValidator
+from src.forecast_store import new_run_id
+from src.pipeline import Task, file_stamp
+from utils.async_io import BackgroundWriter
+from utils.logger import setup_logging
+
+# Task functions are module-level so that they can be pickled and run in other processes.
+# Each one writes its outputs through its own background writer, which is flushed before
+# the task returns, so a completed task always has its outputs on disk.
+
+
+def clean_country(config, country):
+    """
+    Loads, cleans, validates and saves the raw data of one country. Validation
+    runs before the gaps are filled so that filled values are not reported as
+    stuck; quarantined series are left out of the cleaned snapshot.
+    """
+    logger = setup_logging()
+    country_config = config['countries'][country]
+    io_config = config.get('io', {})
+    catalog = CleanedDataCatalog(config.get('catalog', {}).get('path', DEFAULT_CATALOG_PATH))
+
+    with BackgroundWriter(max_queue_size=io_config.get('write_queue_size', 8)) as writer:
+        cleaner = DataCleaner(writer=writer, catalog=catalog)
+        data = DataLoader(config).load_country_data(country_config['name'], country_config['data_path'])
+        logger.info(f"Cleaning data for {country_config['name']}...")
+        cleaned_data = cleaner.add_missing_dates(data)
+        cleaned_data = cleaner.add_national_column(cleaned_data, country=country_config['name'])
+        cleaned_data = cleaner.set_data_types(cleaned_data)
+        cleaned_data = cleaner.normalize_column_names(cleaned_data)
+        validator = DataValidator(config)
+        report = validator.validate(cleaner.to_series_collection(cleaned_data), country)
+        validator.save_report(report, country, config.get('run_id') or new_run_id())
+        cleaned_data = validator.apply(cleaned_data, report, country)
+        cleaned_data = cleaner.backward_fill(cleaned_data)
+        series = cleaner.to_series_collection(cleaned_data)
+        logger.info(f"{len(series.columns)} series cleaned for {country_config['name']}.")
+        demand_classes = cleaner.classify_demand(series, config.get('intermittent', {}).get('zero_ratio', 0.5))
+        cleaner.save_cleaned_data(cleaned_data, country=country_config['name'], demand_classes=demand_classes)
+    logger.info(f"Data cleaned and saved for {country_config['name']}.")
+
+
+def cleaned_snapshot_exists(config, country):
+    """
+    Returns whether the latest cleaned snapshot of the country is still on disk.
+    """
+    catalog = CleanedDataCatalog(config.get('catalog', {}).get('path', DEFAULT_CATALOG_PATH))
+    try:
+        return os.path.exists(catalog.latest(config['countries'][country]['name']))
+    except FileNotFoundError:
+        return False
+
+
+def forecast_level(config, country, level):
+    """
+    Fits the engine configured for a hierarchy level ('national' or 'regional')
+    on one country and writes its forecast.
+    """
+    logger = setup_logging()
+    load_engine_modules(config.get('engine_modules', []))
+    engine_name = engine_for_level(config, level)
+
+    with BackgroundWriter(max_queue_size=config.get('io', {}).get('write_queue_size', 8)) as writer:
+        model = get_engine(engine_name)(config, writer=writer)
+        X, y = model.load_data(country)
+        model.fit(X, y, country=country)
+        logger.info(f"{engine_name} model training completed for {config['countries'][country]['name']}.")
+        model.forecast(X, country=country)
+    logger.info(f"{level.capitalize()}-level forecast completed for {config['countries'][country]['name']}.")
+
+
+def engine_for_level(config, level):
+    """
+    Returns the name of the engine configured for a hierarchy level, or for
+    the intermittent regions ('intermittent').
+    """
+    defaults = {'national': 'prophet', 'regional': 'xgboost', 'intermittent': 'croston'}
+    return config.get('engines', {}).get(level, defaults[level])
+
+
+def build_tasks(config):
+    """
+    Builds the task DAG of the pipeline: for every country, cleaning, then the
+    national forecast, then the regional forecast. Tasks are ordered stage by
+    stage so that every task comes after its dependencies.
+
+    Returns:
+    --------
+    list
+        Tasks of the pipeline.
+    """
+    load_engine_modules(config.get('engine_modules', []))
+    stages = {'clean': [], 'national': [], 'regional': []}
+    for country, country_config in config['countries'].items():
+        clean = Task('clean', country, clean_country, args=(config, country),
+                     inputs={'raw': file_stamp(country_config['data_path']), 'country': country_config,
+                             'validation': config.get('validation'), 'intermittent': config.get('intermittent')},
+                     check=cleaned_snapshot_exists)
+        stages['clean'].append(clean)
+
+        deps = [clean]
+        for level in ('national', 'regional'):
+            engine_class = get_engine(engine_for_level(config, level))
+            inputs = {
+                'engine': engine_class.engine_name,
+                'country': country_config,
+                'params': config.get('model_params', {}).get(country, {}),
+                'quantiles': config.get('forecast_quantiles'),
+                'as_of_date': config.get('as_of_date'),
+            }
+            if level == 'regional':
+                # Intermittent regions are forecast by their own engine
+                inputs['intermittent'] = [engine_for_level(config, 'intermittent'), config.get('intermittent')]
+            outputs = [engine_class.forecast_file.format(country=country)] if engine_class.forecast_file else []
+            task = Task(level, country, forecast_level, args=(config, country, level), deps=deps,
+                        inputs=inputs, outputs=outputs)
+            stages[level].append(task)
+            # The regional stage reads the national forecast
+            deps = deps + [task]
+
+    return stages['clean'] + stages['national'] + stages['regional']
@@ -0,0 +1,232 @@
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from utils.shared_memory import SharedArray, attach_array, detach_array
+
+
+class SeriesCollection:
+    """
+    Compact in-memory container for a set of aligned time series.
+
+    Values are stored as a single (n_periods, n_series) float32 array, dates as
+    int32 day offsets from a start date and series ids as a pandas Categorical,
+    which roughly halves the footprint of the equivalent float64 DataFrame.
+
+    Attributes:
+    -----------
+    values : np.ndarray
+        Series values with one column per series.
+    date_offsets : np.ndarray
+        Day offsets of every row from `start`.
+    start : pd.Timestamp
+        Date of offset 0.
+    series_ids : pd.Categorical
+        Name of every series (one per column of `values`).
+    """
+
+    def __init__(self, values, date_offsets, start, series_ids, dtype=np.float32):
+        self.values = np.ascontiguousarray(values, dtype=dtype)
+        if self.values.ndim == 1:
+            self.values = self.values.reshape(-1, 1)
+        self.date_offsets = np.asarray(date_offsets, dtype=np.int32)
+        self.start = pd.Timestamp(start)
+        self.series_ids = pd.Categorical(series_ids)
+
+        if self.values.shape != (len(self.date_offsets), len(self.series_ids)):
+            raise ValueError(f"Values of shape {self.values.shape} do not match "
+                             f"{len(self.date_offsets)} dates and {len(self.series_ids)} series")
+
+    @classmethod
+    def from_frame(cls, data, date_column='date', columns=None, dtype=np.float32):
+        """
+        Builds a collection from a wide DataFrame with one column per series.
+
+        Parameters:
+        -----------
+        data : pd.DataFrame
+            Data containing a date column and the series columns.
+        date_column : str
+            Name of the date column.
+        columns : list, optional
+            Series columns to keep. Defaults to every column except the date.
+        dtype : np.dtype
+            Value dtype (float32 by default).
+
+        Returns:
+        --------
+        SeriesCollection
+        """
+        if columns is None:
+            columns = [col for col in data.columns if col != date_column]
+        dates = pd.to_datetime(data[date_column])
+        start = dates.min()
+        offsets = (dates - start).dt.days.to_numpy()
+        return cls(data[columns].to_numpy(dtype=dtype), offsets, start, list(columns), dtype=dtype)
+
+    @property
+    def dates(self):
+        """
+        Returns the dates of the rows as a DatetimeIndex.
+        """
+        return self.start + pd.to_timedelta(self.date_offsets, unit='D')
+
+    @property
+    def columns(self):
+        """
+        Returns the series ids as a list.
+        """
+        return list(self.series_ids)
+
+    @property
+    def nbytes(self):
+        """
+        Returns the memory used by the values, date offsets and series ids.
+        """
+        return int(self.values.nbytes + self.date_offsets.nbytes + self.series_ids.nbytes)
+
+    def __len__(self):
+        return len(self.date_offsets)
+
+    def __contains__(self, series_id):
+        return series_id in self.series_ids.categories
+
+    def _index(self, series_id):
+        matches = np.flatnonzero(self.series_ids == series_id)
+        if len(matches) == 0:
+            raise KeyError(series_id)
+        return matches[0]
+
+    def __getitem__(self, series_id):
+        """
+        Returns the values of one series as a (read-only view of a) 1-D array.
+        """
+        return self.values[:, self._index(series_id)]
+
+    def select(self, series_ids):
+        """
+        Returns a new collection with only the given series.
+        """
+        indices = [self._index(series_id) for series_id in series_ids]
+        return SeriesCollection(self.values[:, indices], self.date_offsets, self.start, list(series_ids),
+                                dtype=self.values.dtype)
+
+    def rows(self, index):
+        """
+        Returns a new collection with the rows selected by a slice or boolean mask.
+        """
+        return SeriesCollection(self.values[index], self.date_offsets[index], self.start, self.columns,
+                                dtype=self.values.dtype)
+
+    def to_frame(self, date_column='date'):
+        """
+        Converts the collection back to a wide DataFrame.
+        """
+        frame = pd.DataFrame(self.values, columns=self.columns)
+        frame.insert(0, date_column, self.dates)
+        return frame
+
+
+class FeatureMatrix:
+    """
+    Dense float32 feature matrix shared by all series of a country.
+
+    Features are kept as a single contiguous array so that it can be handed to
+    XGBoost (`DMatrix`/`QuantileDMatrix`) or NumPy solvers without copies.
+
+    Attributes:
+    -----------
+    values : np.ndarray
+        Feature values of shape (n_rows, n_features).
+    feature_names : list
+        Name of every feature column.
+    date_offsets : np.ndarray
+        Day offsets of every row from `start`.
+    start : pd.Timestamp
+        Date of offset 0.
+    """
+
+    def __init__(self, values, feature_names, date_offsets, start, dtype=np.float32):
+        self.values = np.ascontiguousarray(values, dtype=dtype).reshape(len(date_offsets), len(feature_names))
+        self.feature_names = list(feature_names)
+        self.date_offsets = np.asarray(date_offsets, dtype=np.int32)
+        self.start = pd.Timestamp(start)
+
+    @property
+    def dates(self):
+        """
+        Returns the dates of the rows as a DatetimeIndex.
+        """
+        return self.start + pd.to_timedelta(self.date_offsets, unit='D')
+
+    @property
+    def nbytes(self):
+        """
+        Returns the memory used by the feature values and date offsets.
+        """
+        return int(self.values.nbytes + self.date_offsets.nbytes)
+
+    def __len__(self):
+        return len(self.date_offsets)
+
+    def share(self):
+        """
+        Publishes the feature values to shared memory for worker processes.
+
+        Returns:
+        --------
+        tuple
+            (shared, handle) where `shared` is the SharedArray to unlink once the
+            workers are done and `handle` the picklable description passed to `attach`.
+        """
+        shared = SharedArray.publish(self.values)
+        return shared, (shared.handle, self.feature_names, self.date_offsets, self.start)
+
+    @classmethod
+    def attach(cls, handle):
+        """
+        Rebuilds a read-only feature matrix on top of shared memory published by `share` (zero-copy).
+        """
+        array_handle, feature_names, date_offsets, start = handle
+        return cls(attach_array(array_handle), feature_names, date_offsets, start)
+
+    @classmethod
+    @contextmanager
+    def attached(cls, handle):
+        """
+        Context manager around `attach` that closes the worker's mapping of the
+        shared block on exit, so long-lived workers do not keep one per call.
+        """
+        matrix = cls.attach(handle)
+        try:
+            yield matrix
+        finally:
+            matrix.values = None  # Drop the view so that the mapping can be closed
+            detach_array(handle[0])
+
+    def column(self, name):
+        """
+        Returns the values of one feature.
+        """
+        return self.values[:, self.feature_names.index(name)]
+
+    def rows(self, index):
+        """
+        Returns a new matrix with the rows selected by a slice or boolean mask.
+        """
+        return FeatureMatrix(self.values[index], self.feature_names, self.date_offsets[index], self.start,
+                             dtype=self.values.dtype)
+
+    def to_frame(self, date_column='date'):
+        """
+        Converts the matrix to a DataFrame with a date column.
+        """
+        frame = pd.DataFrame(self.values, columns=self.feature_names)
+        frame.insert(0, date_column, self.dates)
+        return frame
+
+
+def quantile_column(name, quantile):
+    """
+    Returns the column name of a quantile forecast (e.g., 'region_1_p10').
+    """
+    return f"{name}_p{int(round(quantile * 100))}"
@@ -0,0 +1,19 @@
+# tests/forecast_helpers.py
+
+import numpy as np
+import pandas as pd
+
+from src.forecast_store import ForecastStore
+from src.series import SeriesCollection
+
+
+def append_run(store, run_id, start, values):
+    dates = pd.date_range(start, periods=len(values), freq='W-MON')
+    predictions = SeriesCollection(np.asarray(values, dtype=np.float32).reshape(-1, 1), (dates - dates[0]).days,
+                                   dates[0], ['region_1'])
+    store.append(ForecastStore.to_long(run_id, 'country_1', 'regional', predictions))
+
+
+def make_actuals(start, values):
+    return pd.DataFrame({'country': 'country_1', 'series': 'region_1',
+                         'date': pd.date_range(start, periods=len(values), freq='W-MON'), 'actual': values})
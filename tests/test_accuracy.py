@@ -0,0 +1,47 @@
+# tests/test_accuracy.py
+
+import numpy as np
+import pandas as pd
+
+from forecast_helpers import append_run, make_actuals
+from src.accuracy import AccuracyTracker, load_actuals
+from src.catalog import CleanedDataCatalog
+from src.forecast_store import ForecastStore
+
+
+def test_incremental_accuracy_matches_full_evaluation(tmp_path):
+    store = ForecastStore(str(tmp_path / 'store'))
+    append_run(store, 'run_1', '2024-01-01', [110, 90, 100])
+    append_run(store, 'run_2', '2024-01-08', [100, 120, 100])
+
+    tracker = AccuracyTracker(store, str(tmp_path / 'accuracy'))
+    # First two weeks of actuals, then the next two
+    assert tracker.update(make_actuals('2024-01-01', [100, 100])) == 3
+    assert tracker.update(make_actuals('2024-01-01', [100, 100, 100, 100])) == 3
+    assert tracker.update(make_actuals('2024-01-01', [100, 100, 100, 100])) == 0
+
+    full = AccuracyTracker(store, str(tmp_path / 'full'))
+    full.update(make_actuals('2024-01-01', [100, 100, 100, 100]))
+    pd.testing.assert_frame_equal(tracker.report(by=['run_id', 'horizon']), full.report(by=['run_id', 'horizon']))
+
+    by_run = tracker.report(by=['run_id']).set_index('run_id')
+    assert by_run.loc['run_1', 'n'] == 3 and by_run.loc['run_2', 'n'] == 3
+    np.testing.assert_allclose(by_run.loc['run_1', ['mape', 'wape', 'bias']].astype(float), [0.2 / 3, 0.2 / 3, 0])
+    np.testing.assert_allclose(by_run.loc['run_2', ['mape', 'wape', 'bias']].astype(float), [0.2 / 3, 0.2 / 3, 0.2 / 3])
+
+
+def test_actuals_skip_countries_without_snapshot(tmp_path):
+    catalog = CleanedDataCatalog(str(tmp_path / 'catalog.sqlite'))
+    data = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=3, freq='W-MON'), 'region_1': [1.0, 2.0, 3.0]})
+    path = str(tmp_path / 'CleanedSalesCountry1_2024-01-22.xlsx')
+    data.to_excel(path, index=False)
+    catalog.register('Country 1', path, data)
+
+    config = {'catalog': {'path': str(tmp_path / 'catalog.sqlite')},
+              'countries': {'country_1': {'name': 'Country 1'}, 'country_2': {'name': 'Country 2'}}}
+    actuals = load_actuals(config)
+    assert set(actuals['country']) == {'country_1'}
+    assert list(actuals['actual']) == [1.0, 2.0, 3.0]
+
+    del config['countries']['country_1']
+    assert load_actuals(config).empty
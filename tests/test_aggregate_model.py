@@ -14,15 +14,12 @@ if __name__ == "__main__":
     country_to_process = 'country_1'
 
     # Step 1: Load the data
-    prophet_model.load_data(country=country_to_process)
+    X, y = prophet_model.load_data(country=country_to_process)
 
-    # Step 2: Preprocess the data
-    prophet_model.preprocess_data()
+    # Step 2: Fit the model
+    prophet_model.fit(X, y, country=country_to_process)
 
-    # Step 3: Fit the model
-    prophet_model.fit()
-
-    # Step 4: Forecast future data
-    prophet_model.forecast()
+    # Step 3: Forecast future data
+    prophet_model.forecast(X, country=country_to_process)
 
     print("Prophet model test completed.")
@@ -0,0 +1,60 @@
+# tests/test_analysis_cubes.py
+
+import numpy as np
+import pandas as pd
+
+from forecast_helpers import append_run, make_actuals
+from src.accuracy import AccuracyTracker
+from src.analysis_cubes import AnalysisCubes
+from src.forecast_store import ForecastStore
+
+
+def test_cubes_summarize_runs_and_latest_forecast(tmp_path):
+    store = ForecastStore(str(tmp_path / 'store'))
+    append_run(store, 'run_1', '2024-01-29', [110, 90, 100])
+    append_run(store, 'run_2', '2024-02-05', [100, 120, 100])
+    actuals = make_actuals('2024-01-01', [100] * 7)
+
+    tracker = AccuracyTracker(store, str(tmp_path / 'accuracy'))
+    tracker.update(actuals)
+    paths = AnalysisCubes(store, tracker, str(tmp_path / 'cubes')).build(actuals)
+
+    errors = pd.read_parquet(paths['errors'])
+    assert set(errors['run_id']) == {'run_1', 'run_2'}
+    run_1 = errors[errors['run_id'] == 'run_1'].sort_values('horizon')
+    np.testing.assert_allclose(run_1['mape'], [0.1, 0.1, 0.0])
+
+    # History up to the last actual, then the forecast of the latest run
+    latest = pd.read_parquet(paths['actual_vs_forecast'])
+    assert len(latest) == 7 + 1
+    assert latest['forecast'].notna().sum() == 3 and set(latest['run_id'].dropna()) == {'run_2'}
+    assert latest['actual'].iloc[-1] != latest['actual'].iloc[-1]  # Not observed yet
+
+    rollups = pd.read_parquet(paths['rollups']).set_index(['run_id', 'month'])
+    february = rollups.loc[('run_2', pd.Timestamp('2024-02-01'))]
+    assert (february['periods'], february['forecast'], february['observed'], february['actual']) == (3, 320, 2, 200)
+
+
+def test_rollups_updated_incrementally(tmp_path):
+    store = ForecastStore(str(tmp_path / 'store'))
+    append_run(store, 'run_1', '2024-01-29', [110, 90, 100])
+    tracker = AccuracyTracker(store, str(tmp_path / 'accuracy'))
+    cubes = AnalysisCubes(store, tracker, str(tmp_path / 'cubes'))
+    cubes.build(make_actuals('2024-01-01', [100] * 5))
+
+    # A new run and new actuals: run_1 is only read for the actuals after the watermark
+    append_run(store, 'run_2', '2024-02-05', [100, 120, 100])
+    actuals = make_actuals('2024-01-01', [100] * 7)
+    reads = []
+    read = store.read
+    store.read = lambda *args, **kwargs: reads.append(kwargs) or read(*args, **kwargs)
+    paths = cubes.build(actuals)
+    incremental_reads = [(kwargs['run_id'], kwargs['country']) for kwargs in reads if kwargs['since'] is not None]
+    assert incremental_reads == [(['run_1'], ['country_1'])]
+    # Full reads (latest forecasts and new rollups) only load the new run
+    assert all(kwargs['run_id'] == ['run_2'] for kwargs in reads if kwargs['since'] is None)
+
+    full = AnalysisCubes(store, tracker, str(tmp_path / 'full')).build(actuals)
+    incremental = pd.read_parquet(paths['rollups'])
+    expected = pd.read_parquet(full['rollups'])
+    pd.testing.assert_frame_equal(incremental, expected)
@@ -0,0 +1,23 @@
+# tests/test_async_io.py
+
+import pytest
+
+from utils.async_io import BackgroundWriter
+
+
+def test_background_writer_flushes_and_reports_errors(tmp_path):
+    def write(path, text):
+        path.write_text(text)
+
+    def fail():
+        raise IOError("disk full")
+
+    with BackgroundWriter(max_queue_size=2) as writer:
+        for i in range(5):
+            writer.submit(write, tmp_path / f'output_{i}.txt', str(i))
+        writer.flush()
+        assert sorted(p.name for p in tmp_path.iterdir()) == [f'output_{i}.txt' for i in range(5)]
+
+        writer.submit(fail)
+        with pytest.raises(IOError):
+            writer.flush()
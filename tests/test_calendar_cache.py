@@ -0,0 +1,34 @@
+# tests/test_calendar_cache.py
+
+import numpy as np
+import pandas as pd
+
+from prophet import Prophet
+
+from src.calendar_cache import CalendarCache
+
+
+def test_arrays_are_computed_once_and_read_only():
+    cache = CalendarCache()
+    weeks = cache.week_of_year('2021-01-04', 52, 'W-MON')
+
+    assert cache.week_of_year('2021-01-04', 52, 'W-MON') is weeks
+    assert not weeks.flags.writeable
+    assert list(weeks[:3]) == [1, 2, 3] and weeks[-1] == 52
+    assert cache.date_range('2021-01-04', 52, 'W-MON') is cache.date_range('2021-01-04', 52, 'W-MON')
+
+    terms = cache.fourier_terms('2021-01-04', 52, 'W-MON', 365.25, 3)
+    assert cache.fourier_terms('2021-01-04', 52, 'W-MON', 365.25, 3) is terms
+    assert not terms.flags.writeable
+    dates = pd.Series(cache.date_range('2021-01-04', 52, 'W-MON'))
+    np.testing.assert_allclose(terms, Prophet.fourier_series(dates, 365.25, 3))
+
+
+def test_future_dates_and_holiday_flags():
+    cache = CalendarCache()
+    future = cache.future_dates('2024-03-25', 3, 'W-MON')
+    assert list(future) == list(pd.to_datetime(['2024-04-01', '2024-04-08', '2024-04-15']))
+
+    # Week of Monday 2024-07-01 contains Independence Day, the following week does not
+    flags = cache.holiday_flags('2024-07-01', 2, 'W-MON', 'US')
+    assert list(flags) == [1, 0]
@@ -0,0 +1,53 @@
+# tests/test_catalog.py
+
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.catalog import CleanedDataCatalog
+
+
+def save_snapshot(catalog, folder, day, value):
+    data = pd.DataFrame({'date': pd.date_range('2021-05-03', periods=4, freq='W-MON'), 'national': [value] * 4})
+    path = os.path.join(folder, f'CleanedSalesCountry1_2024-01-{day:02d}.xlsx')
+    data.to_excel(path, index=False)
+    catalog.register('Country 1', path, data, created_at=datetime(2024, 1, day, 6))
+    return path
+
+
+def test_latest_as_of_and_compact(tmp_path):
+    catalog = CleanedDataCatalog(str(tmp_path / 'catalog.sqlite'))
+    paths = {day: save_snapshot(catalog, str(tmp_path), day, value)
+             for day, value in [(1, 1.0), (2, 2.0), (3, 2.0), (4, 4.0)]}
+
+    assert catalog.latest('Country 1') == paths[4]
+    assert catalog.as_of('Country 1', '2024-01-02') == paths[2]
+    with pytest.raises(FileNotFoundError):
+        catalog.as_of('Country 1', '2023-12-31')
+
+    entry = catalog.snapshots('Country 1').iloc[0]
+    assert (entry['start_date'], entry['end_date'], entry['n_rows']) == ('2021-05-03', '2021-05-24', 4)
+
+    classes = pd.DataFrame({'series': ['national'], 'zero_ratio': [0.0], 'demand_class': ['smooth']})
+    catalog.register('Country 1', paths[4], pd.read_excel(paths[4]), created_at=datetime(2024, 1, 4, 6),
+                     demand_classes=classes)
+    assert catalog.demand_classes(paths[4]) == {'national': 'smooth'}
+    assert catalog.demand_classes(paths[3]) == {}
+
+    # Keep two snapshots; day 2 duplicates day 3 and is removed too
+    removed = catalog.compact(keep=2)
+    assert sorted(removed) == [paths[1], paths[2]]
+    assert not os.path.exists(paths[1]) and os.path.exists(paths[3])
+    assert list(catalog.snapshots()['path']) == [paths[4], paths[3]]
+
+
+def test_existing_snapshots_are_indexed_once(tmp_path):
+    data = pd.DataFrame({'date': pd.date_range('2021-05-03', periods=3, freq='W-MON'), 'national': [1.0, 2.0, 3.0]})
+    path = str(tmp_path / 'CleanedSalesCountry2_2024-01-01.xlsx')
+    data.to_excel(path, index=False)
+
+    catalog = CleanedDataCatalog(str(tmp_path / 'catalog.sqlite'))
+    assert catalog.latest('Country 2') == path
+    assert len(catalog.snapshots('Country 2')) == 1
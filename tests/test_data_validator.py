@@ -0,0 +1,62 @@
+# tests/test_data_validator.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_validator import DataValidator
+from src.series import SeriesCollection
+
+
+def make_data(n_rows=40):
+    rng = np.random.default_rng(5)
+    data = pd.DataFrame({'date': pd.date_range('2022-01-03', periods=n_rows, freq='W-MON')})
+    for i in range(1, 4):
+        data[f'region_{i}'] = 100 * i + rng.normal(0, 3, n_rows)
+    data['national'] = data[['region_1', 'region_2', 'region_3']].sum(axis=1)
+    return data
+
+
+def test_validator_flags_every_check(tmp_path):
+    data = make_data()
+    data.loc[10, 'region_1'] = -5.0
+    data.loc[20, 'region_2'] = 2000.0
+    data.loc[25:31, 'region_3'] = 300.0
+    data.loc[5:6, 'national'] *= 1.2
+    validator = DataValidator({'validation': {'report_dir': str(tmp_path)}})
+    report = validator.validate(SeriesCollection.from_frame(data), 'country_1')
+
+    fired = {(row.series, row.check): row.n_flagged for row in report.itertuples()}
+    assert fired[('region_1', 'negative')] == 1
+    assert fired[('region_2', 'spike')] == 1
+    assert fired[('region_3', 'stuck')] == 7
+    # The negative value and the spike break the sum as well, the stuck value is within tolerance
+    assert fired[('national', 'hierarchy')] == 2 + 1 + 1
+    assert {check for series, check in fired if series == 'region_3'} == {'stuck'}
+    assert report.loc[report['series'] == 'region_3', 'first_flagged'].iloc[0] == data.loc[25, 'date']
+    assert not any(check == 'stuck' and series != 'region_3' for series, check in fired)
+
+    cleaned = validator.apply(data, report, 'country_1')
+    assert 'region_1' not in cleaned and 'region_2' in cleaned
+
+    path = validator.save_report(report, 'country_1', 'run_1')
+    assert len(pd.read_csv(path)) == len(report)
+
+
+def test_validator_ignores_gaps_and_zero_runs():
+    data = make_data()
+    data.loc[3:8, 'region_1'] = np.nan
+    data.loc[12:30, 'region_2'] = 0.0
+    data['national'] = data[['region_1', 'region_2', 'region_3']].sum(axis=1, min_count=3)
+    # The drop to zero sales is a spike of its own, only the other checks are run
+    report = DataValidator({'validation': {'spike': 'off'}}).validate(SeriesCollection.from_frame(data), 'country_1')
+    assert report.empty
+
+
+def test_quarantined_national_fails_country():
+    data = make_data()
+    data.loc[0, 'national'] = -1.0
+    validator = DataValidator({'validation': {'hierarchy': 'off'}})
+    report = validator.validate(SeriesCollection.from_frame(data), 'country_1')
+    with pytest.raises(ValueError):
+        validator.apply(data, report, 'country_1')
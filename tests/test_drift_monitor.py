@@ -0,0 +1,84 @@
+# tests/test_drift_monitor.py
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from models.linear_model import LinearModel
+from src.drift_monitor import DriftMonitor, ModelStateStore
+from src.series import FeatureMatrix, SeriesCollection
+
+
+def make_data(n_rows, shift_from=None):
+    rng = np.random.default_rng(3)
+    features = rng.normal(size=(n_rows, 2))
+    data = pd.DataFrame({'date': pd.date_range('2022-01-03', periods=n_rows, freq='W-MON')})
+    data['region_1'] = 100 + 5 * features[:, 0] + rng.normal(0, 0.5, n_rows)
+    data['region_2'] = 200 + 5 * features[:, 1] + rng.normal(0, 0.5, n_rows)
+    if shift_from is not None:
+        data.loc[shift_from:, 'region_2'] += 150
+    Y = SeriesCollection.from_frame(data)
+    X = FeatureMatrix(features, ['feature_0', 'feature_1'], Y.date_offsets, Y.start)
+    return X, Y
+
+
+def make_config(tmp_path):
+    return {'model_dir': str(tmp_path / 'models'),
+            'retraining': {'enabled': True, 'state_path': str(tmp_path / 'state.sqlite')}}
+
+
+def test_monitor_flags_breached_drifted_stale_and_new_series():
+    X, Y = make_data(60)
+    predictions = SeriesCollection(Y.values.copy(), Y.date_offsets, Y.start, Y.columns)
+    state = DriftMonitor.training_state(Y.rows(slice(0, 50)), predictions.rows(slice(0, 50)),
+                                        trained_at=datetime(2024, 1, 1))
+    monitor = DriftMonitor(mape_ratio=1.5, min_mape=0.05, drift_z=3.0, max_age_days=28)
+    rows = monitor.new_rows(Y, state)
+    assert rows.sum() == 10
+
+    assert monitor.check(Y, state, predictions.rows(rows), now=datetime(2024, 1, 10)) == {}
+
+    # Stored model for region_2 is far off on the new weeks
+    bad = predictions.values[rows].copy()
+    bad[:, 1] *= 0.5
+    reasons = monitor.check(Y, state, SeriesCollection(bad, Y.date_offsets[rows], Y.start, Y.columns),
+                            now=datetime(2024, 1, 10))
+    assert list(reasons) == ['region_2'] and 'MAPE' in reasons['region_2']
+
+    assert set(monitor.check(Y, state, predictions.rows(rows), now=datetime(2024, 3, 1))) == {'region_1', 'region_2'}
+    assert monitor.check(Y, state.drop('region_1'), predictions.rows(rows),
+                         now=datetime(2024, 1, 10)) == {'region_1': 'no stored model'}
+
+
+def test_only_drifted_series_are_retrained(tmp_path):
+    config = make_config(tmp_path)
+    X, Y = make_data(50)
+    model = LinearModel(config)
+    model.fit(X, Y, 'country_1')
+    first = {series: coefficients.copy() for series, coefficients in model.model.items()}
+
+    # Rerun on the same data: every stored model is reused
+    rerun = LinearModel(config)
+    assert rerun._series_to_retrain(X, Y, 'country_1') == []
+
+    # Four new weeks with a level shift in region_2 only
+    X, Y = make_data(54, shift_from=50)
+    model = LinearModel(config)
+    model.fit(X, Y, 'country_1')
+    np.testing.assert_array_equal(model.model['region_1'], first['region_1'])
+    assert not np.allclose(model.model['region_2'], first['region_2'])
+
+    state = ModelStateStore(config['retraining']['state_path']).load('linear', 'country_1')
+    assert state.loc['region_2', 'last_date'] == Y.dates.max()
+    assert state.loc['region_1', 'last_date'] == Y.dates[49]
+
+
+def test_models_trained_on_other_features_are_retrained(tmp_path):
+    config = make_config(tmp_path)
+    X, Y = make_data(50)
+    LinearModel(config).fit(X, Y, 'country_1')
+
+    wider = FeatureMatrix(np.hstack([X.values, X.values[:, :1]]), X.feature_names + ['feature_2'],
+                          X.date_offsets, X.start)
+    assert LinearModel(config)._series_to_retrain(wider, Y, 'country_1') == ['region_1', 'region_2']
@@ -0,0 +1,51 @@
+# tests/test_forecast_store.py
+
+import numpy as np
+import pandas as pd
+
+from src.forecast_store import ForecastStore
+from src.series import SeriesCollection
+
+
+def make_forecasts(run_id, country, offset=0.0):
+    dates = pd.date_range('2024-04-01', periods=3, freq='W-MON')
+    values = np.arange(6, dtype=np.float32).reshape(3, 2) + offset
+    predictions = SeriesCollection(values, (dates - dates[0]).days, dates[0], ['region_1', 'region_2'])
+    quantiles = {0.1: SeriesCollection(values - 1, predictions.date_offsets, dates[0], ['region_1', 'region_2']),
+                 0.9: SeriesCollection(values + 1, predictions.date_offsets, dates[0], ['region_1', 'region_2'])}
+    return ForecastStore.to_long(run_id, country, 'regional', predictions, quantiles)
+
+
+def test_long_format_appended_per_run(tmp_path):
+    store = ForecastStore(str(tmp_path / 'store'), quantiles=[0.1, 0.9])
+    frame = make_forecasts('run_1', 'country_1')
+    assert list(frame['series']) == ['region_1'] * 3 + ['region_2'] * 3
+    assert list(frame['horizon']) == [1, 2, 3] * 2
+    assert list(frame['value']) == [0, 2, 4, 1, 3, 5]
+
+    store.append(frame)
+    store.append(make_forecasts('run_1', 'country_2'))
+    store.append(make_forecasts('run_2', 'country_1', offset=10))
+    # Retrying a run replaces its rows instead of duplicating them
+    store.append(make_forecasts('run_2', 'country_1', offset=10))
+
+    runs = store.runs().sort_values(['run_id', 'country'])
+    assert runs.values.tolist() == [['run_1', 'country_1', 'regional'], ['run_1', 'country_2', 'regional'],
+                                    ['run_2', 'country_1', 'regional']]
+
+    history = store.read(country='country_1')
+    assert len(history) == 12
+    assert sorted(history['run_id'].unique()) == ['run_1', 'run_2']
+
+    latest = store.read(columns=['series', 'horizon', 'value', 'value_p90'], country='country_1', run_id='run_2')
+    assert list(latest.columns) == ['series', 'horizon', 'value', 'value_p90']
+    np.testing.assert_array_equal(latest.sort_values(['series', 'horizon'])['value_p90'], [11, 13, 15, 12, 14, 16])
+
+
+def test_missing_quantile_columns_read_as_nan(tmp_path):
+    ForecastStore(str(tmp_path / 'store')).append(make_forecasts('run_1', 'country_1')[
+        ['run_id', 'country', 'level', 'series', 'date', 'horizon', 'value']])
+
+    frame = ForecastStore(str(tmp_path / 'store'), quantiles=[0.1, 0.9]).read()
+    assert len(frame) == 6
+    assert frame['value_p10'].isna().all()
@@ -0,0 +1,152 @@
+# tests/test_intermittent_model.py
+
+import numpy as np
+import pandas as pd
+
+from models.intermittent_model import IntermittentModel, croston, tsb
+from models.item_model import XGBoostModel
+from src.data_cleaner import DataCleaner
+from src.forecast_store import ForecastStore
+from src.series import FeatureMatrix, SeriesCollection
+
+
+def sparse_values(n_rows=60, n_series=5):
+    rng = np.random.default_rng(4)
+    return np.where(rng.random((n_rows, n_series)) < 0.3, rng.integers(1, 20, (n_rows, n_series)), 0).astype(float)
+
+
+def make_mixed_regions(n_rows=80, region_2=None):
+    # Smooth region_1 and region_2 intermittent unless given
+    rng = np.random.default_rng(2)
+    features = rng.normal(size=(n_rows, 2))
+    data = pd.DataFrame({'date': pd.date_range('2021-01-04', periods=n_rows, freq='W-MON')})
+    data['region_1'] = 100 + 10 * features[:, 0]
+    data['region_2'] = sparse_values(n_rows, 1)[:, 0] if region_2 is None else region_2
+    Y = SeriesCollection.from_frame(data)
+    return FeatureMatrix(features, ['feature_0', 'feature_1'], Y.date_offsets, Y.start), Y
+
+
+def croston_reference(y, alpha):
+    size = interval = None
+    since_demand = 0
+    for value in y:
+        since_demand += 1
+        if value > 0:
+            if size is None:
+                size, interval = value, since_demand
+            else:
+                size += alpha * (value - size)
+                interval += alpha * (since_demand - interval)
+            since_demand = 0
+    return 0.0 if size is None else size / interval
+
+
+def tsb_reference(y, alpha, beta):
+    demand = y > 0
+    size = y[demand][0] if demand.any() else 0.0
+    probability = demand.mean()
+    for value in y:
+        if value > 0:
+            size += alpha * (value - size)
+        probability += beta * ((value > 0) - probability)
+    return probability * size
+
+
+def test_vectorized_recurrences_match_per_series_loops():
+    values = sparse_values()
+    values[:, -1] = 0.0  # A series without any demand
+
+    expected = [croston_reference(values[:, i], 0.2) for i in range(values.shape[1])]
+    np.testing.assert_allclose(croston(values, 0.2), expected)
+    np.testing.assert_allclose(croston(values, 0.2, 'sba'), np.array(expected) * 0.9)
+    np.testing.assert_allclose(tsb(values, 0.2, 0.1),
+                               [tsb_reference(values[:, i], 0.2, 0.1) for i in range(values.shape[1])])
+
+
+def test_intermittent_regions_routed_to_intermittent_engine(tmp_path):
+    X, Y = make_mixed_regions()
+
+    classes = DataCleaner(catalog=object()).classify_demand(Y)
+    assert list(classes['demand_class']) == ['smooth', 'intermittent']
+
+    config = {'model_dir': str(tmp_path), 'model_params': {'country_1': {'xgboost': {'n_estimators': 10}}}}
+    model = XGBoostModel(config)
+    model.demand_classes = dict(zip(classes['series'], classes['demand_class']))
+    model.fit(X, Y, 'country_1')
+
+    assert list(model.model) == ['region_1']
+    assert isinstance(model.intermittent, IntermittentModel)
+    forecast = model.intermittent.predict_many(X.rows(slice(-4, None)), 'country_1')
+    assert forecast.columns == ['region_2']
+    assert np.allclose(forecast['region_2'], croston(Y.values[:, [1]], 0.1, 'sba')[0])
+
+
+def test_quantiles_kept_for_regions_not_routed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    X, Y = make_mixed_regions()
+
+    config = {'model_dir': str(tmp_path / 'models'), 'forecast_quantiles': [0.1, 0.5, 0.9], 'run_id': 'run_1',
+              'forecast_store': {'path': str(tmp_path / 'store')},
+              'countries': {'country_1': {'forecast_periods': 4}},
+              'model_params': {'country_1': {'xgboost': {'n_estimators': 10}}}}
+    model = XGBoostModel(config)
+    model.demand_classes = {'region_1': 'smooth', 'region_2': 'intermittent'}
+    model.fit(X, Y, 'country_1')
+    model.forecast(X, 'country_1')
+
+    stored = ForecastStore(str(tmp_path / 'store'), [0.1, 0.5, 0.9]).read().set_index('series')
+    quantile_columns = ['value_p10', 'value_p50', 'value_p90']
+    assert stored.loc['region_1', quantile_columns].notna().all().all()
+    assert stored.loc['region_2', quantile_columns].isna().all().all()
+    assert stored.loc['region_2', 'value'].notna().all()
+
+
+def test_engines_of_previous_country_not_reused(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {'model_dir': str(tmp_path / 'models'), 'run_id': 'run_1',
+              'forecast_store': {'path': str(tmp_path / 'store')},
+              'countries': {country: {'forecast_periods': 4} for country in ('country_1', 'country_2')},
+              'model_params': {country: {'xgboost': {'n_estimators': 10}} for country in ('country_1', 'country_2')}}
+    model = XGBoostModel(config)
+    model.demand_classes = {'region_1': 'smooth', 'region_2': 'intermittent'}
+    model.fit(*make_mixed_regions(), 'country_1')
+
+    # In country_2, region_2 is smooth and at a much higher level
+    X, Y = make_mixed_regions(region_2=np.full(80, 1000.0))
+    model.demand_classes = {'region_1': 'smooth', 'region_2': 'smooth'}
+    model.fit(X, Y, 'country_2')
+    assert model.intermittent is None
+
+    forecast = model.forecast(X, 'country_2')
+    np.testing.assert_allclose(forecast['region_2'], 1000, rtol=0.01)
+
+
+def test_load_fitted_replaces_engines_of_previous_country(tmp_path, monkeypatch):
+    X, Y = make_mixed_regions()
+    X = FeatureMatrix(X.values, ['national', 'feature_1'], X.date_offsets, X.start)
+    demand_classes = {'country_1': {'national': 'smooth', 'region_1': 'smooth', 'region_2': 'intermittent'},
+                      'country_2': {'national': 'smooth', 'region_1': 'intermittent', 'region_2': 'intermittent'}}
+    config = {'model_dir': str(tmp_path),
+              'countries': {country: {'forecast_periods': 4} for country in demand_classes},
+              'model_params': {country: {'xgboost': {'n_estimators': 10}} for country in demand_classes}}
+    for country, classes in demand_classes.items():
+        model = XGBoostModel(config)
+        model.demand_classes = classes
+        model.fit(X, Y, country)
+    # Every region of country_2 is intermittent, so no XGBoost model is stored for it
+    assert not (tmp_path / 'xgboost_model_country_2.pkl').exists()
+
+    model = XGBoostModel(config)
+
+    def load_data(country):
+        model.demand_classes = demand_classes[country]
+        return X, Y
+
+    monkeypatch.setattr(model, 'load_data', load_data)
+    model.load_fitted('country_1')
+    assert model.what_if(X, [1.0], 'country_1')[1] == ['region_1', 'region_2']
+
+    model.load_fitted('country_2')
+    assert model.model == {}
+    assert model.what_if(X, [1.0], 'country_2')[1] == ['region_1', 'region_2']
+
@@ -0,0 +1,154 @@
+# tests/test_item_model.py
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from models.base_model import _fit_series_shared
+from models.item_model import XGBoostModel
+from models.linear_model import LinearModel
+from src.series import FeatureMatrix, SeriesCollection
+from utils import shared_memory
+
+
+def make_regional_data(n_rows=120, n_regions=3):
+    rng = np.random.default_rng(1)
+    features = rng.normal(size=(n_rows, 4))
+    dates = pd.date_range('2021-01-04', periods=n_rows, freq='W-MON')
+    data = pd.DataFrame({'date': dates})
+    for i in range(n_regions):
+        data[f'region_{i + 1}'] = 100 + 10 * (i + 1) * features[:, i % 4] + rng.normal(0, 1, n_rows)
+    Y = SeriesCollection.from_frame(data)
+    X = FeatureMatrix(features, [f'feature_{i}' for i in range(4)], Y.date_offsets, Y.start)
+    return X, Y
+
+
+def make_config(**xgboost_params):
+    params = {'n_estimators': 50, 'max_depth': 3}
+    params.update(xgboost_params)
+    return {'model_params': {'country_1': {'xgboost': params}}}
+
+
+def test_multi_output_model_shared_by_regions():
+    X, Y = make_regional_data()
+    model = XGBoostModel(make_config(multi_output=True))
+    model.fit_many(X, Y, 'country_1')
+
+    boosters = {id(region_model.booster) for region_model in model.model.values()}
+    assert len(boosters) == 1
+
+    predictions = model.predict_many(X, 'country_1')
+    assert predictions.columns == Y.columns
+    assert predictions.values.shape == Y.values.shape
+    for region in Y.columns:
+        assert np.corrcoef(predictions[region], Y[region])[0, 1] > 0.9
+
+
+def test_early_stopping_records_best_iteration():
+    X, Y = make_regional_data()
+    model = XGBoostModel(make_config(n_estimators=500, early_stopping_rounds=5, validation_periods=20))
+    model.fit_many(X, Y, 'country_1')
+
+    for region_model in model.model.values():
+        assert region_model.best_iteration is not None
+        assert region_model.best_iteration < 500
+        # Prediction only uses the trees up to the best iteration
+        np.testing.assert_allclose(
+            region_model.predict(X.values),
+            region_model.booster.inplace_predict(X.values, iteration_range=(0, region_model.best_iteration + 1)))
+        # The final booster is retrained on all rows for the best number of rounds
+        assert region_model.booster.num_boosted_rounds() == region_model.best_iteration + 1
+
+
+def test_early_stopping_refits_on_latest_rows():
+    X, Y = make_regional_data()
+    config = make_config(n_estimators=500, early_stopping_rounds=5, validation_periods=20)
+    model = XGBoostModel(config)
+    model.fit_many(X, Y, 'country_1')
+
+    # Changing only the held-out validation rows must change the fitted model
+    shifted = Y.values.copy()
+    shifted[-20:] += 50
+    Y_shifted = SeriesCollection(shifted, Y.date_offsets, Y.start, Y.columns)
+    shifted_model = XGBoostModel(config)
+    shifted_model.fit_many(X, Y_shifted, 'country_1')
+
+    for region in Y.columns:
+        latest = X.values[-20:]
+        assert (shifted_model.model[region].predict(latest).mean()
+                > model.model[region].predict(latest).mean() + 10)
+
+
+def test_quantile_forecasts_from_single_multi_quantile_model():
+    X, Y = make_regional_data()
+    config = make_config()
+    config['forecast_quantiles'] = [0.1, 0.5, 0.9]
+    model = XGBoostModel(config)
+    model.fit_many(X, Y, 'country_1')
+
+    quantiles = model.predict_quantiles_many(X, 'country_1')
+    assert sorted(quantiles) == Y.columns
+    for region in Y.columns:
+        assert quantiles[region].shape == (len(X), 3)
+        assert (np.diff(quantiles[region], axis=1) >= 0).all()
+        # The point forecast is the median
+        np.testing.assert_allclose(model.model[region].predict(X.values), quantiles[region][:, 1])
+        coverage = np.mean((Y[region] >= quantiles[region][:, 0]) & (Y[region] <= quantiles[region][:, 2]))
+        assert 0.5 < coverage <= 1.0
+
+
+def test_regions_trained_in_processes_on_shared_features():
+    X, Y = make_regional_data()
+    config = make_config()
+    serial = XGBoostModel(config)
+    serial.fit_many(X, Y, 'country_1')
+
+    config['parallel'] = {'n_jobs': 2, 'prefer': 'processes'}
+    parallel = XGBoostModel(config)
+    parallel.fit_many(X, Y, 'country_1')
+
+    np.testing.assert_allclose(parallel.predict_many(X, 'country_1').values,
+                               serial.predict_many(X, 'country_1').values, rtol=1e-5)
+
+
+def fit_in_worker_and_count_mappings(handle, y):
+    _fit_series_shared(XGBoostModel, make_config(n_estimators=5), handle, y, 'country_1')
+    return len(shared_memory._ATTACHED)
+
+
+def test_workers_release_shared_features_after_fitting():
+    X, Y = make_regional_data()
+    shared, handle = X.share()
+    try:
+        # Spawned like loky workers, so the block is attached rather than inherited
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            counts = [pool.submit(fit_in_worker_and_count_mappings, handle, Y['region_1']).result()
+                      for _ in range(3)]
+    finally:
+        shared.unlink()
+    assert counts == [0, 0, 0]
+
+
+def test_what_if_scenarios_in_one_stacked_predict():
+    X, Y = make_regional_data()
+    national = 50 + np.arange(len(X), dtype=float)
+    X = FeatureMatrix(np.column_stack([X.values, national]), X.feature_names + ['National_forecast'],
+                      X.date_offsets, X.start)
+    Y = SeriesCollection(np.column_stack([2 * national, 3 * national]), Y.date_offsets, Y.start,
+                         ['region_1', 'region_2'])
+    config = {'countries': {'country_1': {'forecast_periods': 6}},
+              'model_params': {'country_1': {'linear': {'alpha': 0.0}}}}
+    model = LinearModel(config)
+    model.fit_many(X, Y, 'country_1')
+
+    forecasts, regions = model.what_if(X, [0.9, 1.0, 1.1], 'country_1')
+    assert forecasts.shape == (3, 2, 6) and regions == ['region_1', 'region_2']
+    np.testing.assert_allclose(forecasts[1], model.predict_many(X.rows(slice(-6, None)), 'country_1').values.T,
+                               rtol=1e-5)
+    np.testing.assert_allclose(forecasts[2] / forecasts[1], 1.1, rtol=1e-3)
+
+    # One factor per forecast period
+    per_period = model.what_if(X, np.linspace(1.0, 1.5, 6)[None, :], 'country_1')[0]
+    np.testing.assert_allclose(per_period[0, 0], 2 * national[-6:] * np.linspace(1.0, 1.5, 6), rtol=1e-3)
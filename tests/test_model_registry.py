@@ -0,0 +1,45 @@
+# tests/test_model_registry.py
+
+import numpy as np
+import pandas as pd
+
+from models.registry import get_engine, available_engines
+from models.item_model import RegionalModel
+from src.series import FeatureMatrix, SeriesCollection
+
+
+def make_series_collection(n_rows=60, n_series=3):
+    rng = np.random.default_rng(0)
+    national = rng.normal(100, 10, n_rows)
+    promo = rng.normal(0, 1, n_rows)
+    data = pd.DataFrame({'date': pd.date_range('2021-01-04', periods=n_rows, freq='W-MON')})
+    for i in range(n_series):
+        data[f'region_{i + 1}'] = 0.2 * (i + 1) * national + 5 * promo + 50
+    Y = SeriesCollection.from_frame(data)
+    X = FeatureMatrix(np.column_stack([national, promo]), ['national', 'promo'], Y.date_offsets, Y.start)
+    return X, Y
+
+
+def test_builtin_engines_are_registered():
+    engines = available_engines()
+    for name in ['linear', 'prophet', 'xgboost']:
+        assert name in engines
+        assert get_engine(name).engine_name == name
+
+
+def test_vectorized_engine_matches_per_series_loop():
+    X, Y = make_series_collection()
+    config = {'model_params': {'country_1': {'linear': {'alpha': 0.0}}}, 'parallel': {'n_jobs': 2}}
+    engine = get_engine('linear')(config)
+    assert engine.vectorized
+
+    engine.fit_many(X, Y, 'country_1')
+    batch_predictions = engine.predict_many(X, 'country_1')
+
+    # Fall back to the generic parallel per-series loop of the base class
+    RegionalModel.fit_many(engine, X, Y, 'country_1')
+    loop_predictions = RegionalModel.predict_many(engine, X, 'country_1')
+
+    assert list(batch_predictions.columns) == list(Y.columns)
+    np.testing.assert_allclose(batch_predictions.values, loop_predictions.values, rtol=1e-5)
+    np.testing.assert_allclose(batch_predictions.values, Y.values, rtol=1e-4)
@@ -0,0 +1,110 @@
+# tests/test_pipeline.py
+
+import os
+
+import pytest
+
+from src.pipeline import PipelineRunner, Task, TaskStateStore
+from utils.executors import make_executor
+
+calls = []
+
+
+def record(name, fail=False):
+    calls.append(name)
+    if fail:
+        raise ValueError(f"{name} failed")
+
+
+def make_tasks(failing=(), raw_version=1, outputs=()):
+    tasks = []
+    for country in ('country_1', 'country_2'):
+        clean = Task('clean', country, record, args=(f'clean/{country}',), inputs={'raw': raw_version})
+        national = Task('national', country, record, args=(f'national/{country}', country in failing), deps=[clean],
+                        outputs=outputs)
+        regional = Task('regional', country, record, args=(f'regional/{country}',), deps=[clean, national])
+        tasks += [clean, national, regional]
+    return tasks
+
+
+def test_failures_are_isolated_and_resumed(tmp_path):
+    store = TaskStateStore(str(tmp_path / 'state.sqlite'))
+    runner = PipelineRunner(store)
+
+    calls.clear()
+    statuses = runner.run(make_tasks(failing=('country_1',)))
+    assert statuses[('national', 'country_1', '')] == 'failed'
+    assert statuses[('regional', 'country_1', '')] == 'blocked'
+    assert statuses[('regional', 'country_2', '')] == 'done'
+    assert 'regional/country_1' not in calls
+
+    # Only the failed task and the one it blocked are run again
+    calls.clear()
+    statuses = runner.run(make_tasks())
+    assert calls == ['national/country_1', 'regional/country_1']
+    assert statuses[('clean', 'country_2', '')] == 'skipped'
+
+    calls.clear()
+    assert set(runner.run(make_tasks()).values()) == {'skipped'}
+    assert calls == []
+
+
+def test_changed_inputs_and_missing_outputs_invalidate_tasks(tmp_path):
+    store = TaskStateStore(str(tmp_path / 'state.sqlite'))
+    runner = PipelineRunner(store)
+    output = tmp_path / 'forecast.xlsx'
+    output.write_text('forecast')
+    runner.run(make_tasks(outputs=[str(output)]))
+
+    # New raw data invalidates the country's tasks and everything downstream
+    calls.clear()
+    runner.run(make_tasks(raw_version=2, outputs=[str(output)]))
+    assert len(calls) == 6
+
+    calls.clear()
+    output.unlink()
+    runner.run(make_tasks(raw_version=2, outputs=[str(output)]))
+    assert calls == ['national/country_1', 'national/country_2']
+
+    calls.clear()
+    assert store.invalidate(stage='regional', country='country_2') == 1
+    runner.run(make_tasks(raw_version=2))
+    assert calls == ['regional/country_2']
+
+
+def write_artifact(path, fail=False):
+    if fail:
+        raise ValueError(f"{path} failed")
+    with open(path, 'w') as f:
+        f.write(str(os.getpid()))
+
+
+@pytest.mark.parametrize('executor_name, module', [
+    ('processes', None),
+    ('dask', 'dask.distributed'),  # Local cluster, optional dependency
+    ('ray', 'ray'),
+])
+def test_tasks_fan_out_to_process_workers(tmp_path, executor_name, module):
+    if module is not None:
+        pytest.importorskip(module)
+    store = TaskStateStore(str(tmp_path / 'state.sqlite'))
+    tasks = []
+    for country in ('country_1', 'country_2', 'country_3'):
+        path = str(tmp_path / f'{country}.txt')
+        tasks.append(Task('regional', country, write_artifact, args=(path, country == 'country_2'), outputs=[path]))
+
+    executor = make_executor(executor_name, max_workers=2)
+    try:
+        statuses = PipelineRunner(store, executor).run(tasks)
+    finally:
+        executor.shutdown()
+
+    assert statuses == {('regional', 'country_1', ''): 'done', ('regional', 'country_2', ''): 'failed',
+                        ('regional', 'country_3', ''): 'done'}
+    # Artifacts written by the workers land in the shared folder and the driver records who ran each task
+    state = store.tasks().set_index('country')
+    for country in ('country_1', 'country_3'):
+        worker_pid = (tmp_path / f'{country}.txt').read_text()
+        assert worker_pid != str(os.getpid())
+        assert state.loc[country, 'worker'].endswith(f':{worker_pid}')
+    assert 'country_2.txt failed' in state.loc['country_2', 'error']
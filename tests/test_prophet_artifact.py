@@ -0,0 +1,112 @@
+# tests/test_prophet_artifact.py
+
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from prophet import Prophet
+
+from models.aggregate_model import ProphetModel
+from models import prophet_artifact
+from models.prophet_artifact import ProphetArtifact
+from src import calendar_cache
+from src.series import FeatureMatrix, SeriesCollection
+
+
+def make_history(n_rows=300, freq='D'):
+    rng = np.random.default_rng(6)
+    dates = pd.date_range('2021-01-01', periods=n_rows, freq=freq)
+    t = np.arange(n_rows)
+    y = 100 + 0.2 * t + 10 * np.sin(2 * np.pi * t / 7) + 20 * np.sin(2 * np.pi * t / 365.25) + rng.normal(0, 2, n_rows)
+    y[n_rows // 2:] += 0.3 * t[n_rows // 2:]  # Trend change
+    return pd.DataFrame({'ds': dates, 'y': y})
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'seasonality_mode': 'multiplicative', 'changepoint_prior_scale': 0.5},
+    {'growth': 'flat', 'yearly_seasonality': 3},
+])
+def test_artifact_reproduces_prophet_predictions(params):
+    history = make_history()
+    prophet = Prophet(uncertainty_samples=0, **params)
+    prophet.add_seasonality('monthly', period=30.5, fourier_order=4)
+    prophet.fit(history)
+
+    future = prophet.make_future_dataframe(periods=60)
+    artifact = ProphetArtifact.from_prophet(prophet)
+    np.testing.assert_allclose(artifact.predict(future)['yhat'], prophet.predict(future)['yhat'], rtol=1e-9)
+
+    # The artifact does not grow with the history
+    assert len(pickle.dumps(artifact)) < len(pickle.dumps(prophet)) / 10
+
+
+def test_national_model_predicts_without_prophet(tmp_path):
+    history = make_history(120, freq='W-MON')
+    Y = SeriesCollection.from_frame(history.rename(columns={'ds': 'date', 'y': 'national'}))
+    X = FeatureMatrix(np.empty((len(Y), 0)), [], Y.date_offsets, Y.start)
+    model = ProphetModel({'forecast_quantiles': [0.1, 0.9]})
+    model.fit_many(X, Y, 'country_1')
+    assert isinstance(model.model['national'].prophet, ProphetArtifact)
+
+    path = tmp_path / 'prophet_model.pkl'
+    path.write_bytes(pickle.dumps(model.model))
+    script = (
+        "import pickle, sys, pandas as pd\n"
+        f"models = pickle.load(open({str(path)!r}, 'rb'))\n"
+        "forecast = models['national'].predict(pd.date_range('2023-05-01', periods=4, freq='W-MON'))\n"
+        "assert not [name for name in sys.modules if name.split('.')[0] in ('prophet', 'cmdstanpy')]\n"
+        "print(len(forecast))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '4'
+
+
+def test_regular_ranges_share_cached_fourier_terms(monkeypatch):
+    monkeypatch.setattr(prophet_artifact, 'calendar_cache', calendar_cache.CalendarCache())
+    computed = []
+    fourier_series = calendar_cache.fourier_series
+    monkeypatch.setattr(calendar_cache, 'fourier_series',
+                        lambda *args: computed.append(args[1:]) or fourier_series(*args))
+
+    artifacts = []
+    for n_rows in (104, 130):  # Two countries with the same calendar
+        prophet = Prophet(uncertainty_samples=0, weekly_seasonality=False, daily_seasonality=False)
+        prophet.fit(make_history(n_rows, freq='W-MON'))
+        artifacts.append(ProphetArtifact.from_prophet(prophet))
+
+    dates = pd.DataFrame({'ds': pd.date_range('2023-01-02', periods=60, freq='W-MON')})
+    predictions = [artifact.predict(dates)['yhat'] for artifact in artifacts]
+    assert computed == [(365.25, 10)]
+    assert not np.allclose(predictions[0], predictions[1])
+
+    # Irregular dates are computed directly, with the same values
+    irregular = dates.drop(index=[5, 17])
+    np.testing.assert_allclose(artifacts[0].predict(irregular)['yhat'], predictions[0].drop(index=[5, 17]))
+
+
+
+def test_national_intervals_widen_with_horizon(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    history = make_history(150, freq='W-MON')
+    Y = SeriesCollection.from_frame(history.rename(columns={'ds': 'date', 'y': 'national'}))
+    X = FeatureMatrix(np.empty((len(Y), 0)), [], Y.date_offsets, Y.start)
+    config = {'forecast_quantiles': [0.1, 0.5, 0.9], 'run_id': 'run_1', 'model_dir': str(tmp_path / 'models'),
+              'forecast_store': {'path': str(tmp_path / 'store')}, 'countries': {'country_1': {'forecast_periods': 12}}}
+    model = ProphetModel(config)
+    model.fit_many(X, Y, 'country_1')
+    forecast = model.forecast(X, 'country_1')
+
+    assert (forecast['yhat_p10'] < forecast['yhat_p50']).all() and (forecast['yhat_p50'] < forecast['yhat_p90']).all()
+    np.testing.assert_allclose(forecast['yhat_p50'], forecast['yhat'])
+    # About 80% of the history lies in the one-step P10-P90 band
+    fitted = forecast.iloc[:len(history)]
+    coverage = np.mean((history['y'] >= fitted['yhat_p10']) & (history['y'] <= fitted['yhat_p90']))
+    assert 0.7 <= coverage <= 0.9
+    # The band widens with the horizon
+    width = (forecast['yhat_p90'] - forecast['yhat_p10']).to_numpy()
+    np.testing.assert_allclose(width[-12:], width[0] * np.sqrt(np.arange(1, 13)))
@@ -0,0 +1,69 @@
+# tests/test_series.py
+
+import numpy as np
+import pandas as pd
+
+from src.feature_builder import FeatureBuilder, ewma, rolling_extremum, rolling_mean_std
+from src.series import SeriesCollection
+
+
+def make_cleaned_data(n_rows=20):
+    data = pd.DataFrame({'date': pd.date_range('2021-05-03', periods=n_rows, freq='W-MON')})
+    data['region_1'] = np.arange(n_rows, dtype=float) * 10
+    data['region_2'] = np.arange(n_rows, dtype=float) * 20
+    data['national'] = data['region_1'] + data['region_2']
+    return data
+
+
+def test_series_collection_round_trip():
+    data = make_cleaned_data()
+    series = SeriesCollection.from_frame(data)
+
+    assert series.values.dtype == np.float32
+    assert series.date_offsets.dtype == np.int32
+    assert series.columns == ['region_1', 'region_2', 'national']
+    assert series.nbytes < data.memory_usage(deep=True).sum()
+    pd.testing.assert_frame_equal(series.to_frame(), data, check_dtype=False, check_freq=False)
+
+
+def test_feature_builder_lags():
+    series = SeriesCollection.from_frame(make_cleaned_data())
+    X, Y = FeatureBuilder({}).build(series, ['region_1', 'region_2'], 'national', num_lags=2)
+
+    assert X.values.dtype == np.float32
+    assert X.feature_names == ['national', 'region_1_lag1', 'region_1_lag2',
+                               'region_2_lag1', 'region_2_lag2', 'National_forecast']
+    # The first two rows are dropped because their lags are missing
+    assert len(X) == len(Y) == 18
+    assert X.dates[0] == series.dates[2]
+    np.testing.assert_array_equal(X.column('region_1_lag2'), series['region_1'][:-2])
+    np.testing.assert_array_equal(Y['region_2'], series['region_2'][2:])
+
+
+def test_window_features_match_pandas():
+    rng = np.random.default_rng(0)
+    values = rng.normal(100, 10, size=(30, 3))
+    frame = pd.DataFrame(values)
+
+    mean, std = rolling_mean_std(values, 4)
+    np.testing.assert_allclose(mean, frame.rolling(4).mean().to_numpy(), equal_nan=True)
+    np.testing.assert_allclose(std, frame.rolling(4).std().to_numpy(), equal_nan=True)
+    np.testing.assert_allclose(rolling_extremum(values, 4, 'max'), frame.rolling(4).max().to_numpy(), equal_nan=True)
+    np.testing.assert_allclose(ewma(values, 0.3), frame.ewm(alpha=0.3, adjust=False).mean().to_numpy())
+
+
+def test_feature_builder_window_and_calendar_features():
+    series = SeriesCollection.from_frame(make_cleaned_data())
+    feature_config = {'rolling_windows': [3], 'rolling_stats': ['mean', 'min'], 'ewma_alphas': [0.5],
+                      'week_of_year': True}
+    X, Y = FeatureBuilder({}).build(series, ['region_1', 'region_2'], 'national', 1, feature_config)
+
+    assert X.feature_names == ['national', 'region_1_lag1', 'region_2_lag1',
+                               'region_1_roll3_mean', 'region_2_roll3_mean', 'region_1_roll3_min', 'region_2_roll3_min',
+                               'region_1_ewma0.5', 'region_2_ewma0.5', 'week_of_year', 'National_forecast']
+    # A 3-week window shifted by one period is complete from the fourth row on
+    assert len(X) == 17
+    # Mean of the three previous weeks of region_1 (0, 10, 20)
+    assert X.column('region_1_roll3_mean')[0] == 10
+    assert X.column('region_2_roll3_min')[0] == 0
+    np.testing.assert_array_equal(X.column('week_of_year'), X.dates.isocalendar().week.to_numpy())
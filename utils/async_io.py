@@ -0,0 +1,78 @@
+import queue
+import threading
+from utils.logger import setup_logging
+
+
+class BackgroundWriter:
+    """
+    Runs output writes on a background thread fed by a bounded queue, so that
+    compute stages hand off writes instead of waiting on disk. `submit` only
+    blocks when `max_queue_size` writes are already pending.
+
+    Errors raised by a write are re-raised by the next `flush` or `close`.
+    """
+
+    def __init__(self, max_queue_size=8):
+        """
+        Parameters:
+        -----------
+        max_queue_size : int
+            Maximum number of pending writes before `submit` blocks.
+        """
+        self.logger = setup_logging()
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._errors = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='background-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                func, args, kwargs = item
+                func(*args, **kwargs)
+            except Exception as e:
+                self.logger.error(f"Error in background write: {e}")
+                self._errors.append(e)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queues a write, e.g. `writer.submit(frame.to_excel, path, index=False)`.
+        """
+        if self._closed:
+            raise RuntimeError("BackgroundWriter is closed")
+        self._queue.put((func, args, kwargs))
+
+    def _raise_errors(self):
+        if self._errors:
+            error = self._errors[0]
+            self._errors = []
+            raise error
+
+    def flush(self):
+        """
+        Waits until every queued write is on disk.
+        """
+        self._queue.join()
+        self._raise_errors()
+
+    def close(self):
+        """
+        Flushes pending writes and stops the background thread.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_errors()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from utils.logger import setup_logging
+
+EXECUTORS = ('serial', 'threads', 'processes', 'dask', 'ray')
+
+
+class SerialExecutor:
+    """
+    Executor running every submitted call immediately in the calling thread.
+    Returns already completed futures, so it can be used wherever a
+    `concurrent.futures` executor is expected.
+    """
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class RayExecutor:
+    """
+    `concurrent.futures`-style executor submitting calls as Ray tasks.
+    """
+
+    def __init__(self, address=None, max_workers=None):
+        import ray
+
+        self._ray = ray
+        if not ray.is_initialized():
+            if address is None:
+                # Local workers import the task functions from the driver's path, like spawned pool workers
+                ray.init(num_cpus=max_workers,
+                         runtime_env={'env_vars': {'PYTHONPATH': os.pathsep.join(path for path in sys.path if path)}})
+            else:
+                ray.init(address=address)
+
+    def submit(self, func, *args, **kwargs):
+        return self._ray.remote(func).remote(*args, **kwargs).future()
+
+    def shutdown(self, wait=True):
+        self._ray.shutdown()
+
+
+class DaskExecutor:
+    """
+    `concurrent.futures`-style executor backed by a Dask distributed client,
+    connected to `address` or to a local cluster started on this machine.
+    """
+
+    def __init__(self, address=None, max_workers=None):
+        from dask.distributed import Client, LocalCluster
+
+        self._cluster = None
+        if address is None:
+            self._cluster = LocalCluster(n_workers=max_workers, threads_per_worker=1, processes=True)
+            address = self._cluster
+        self._client = Client(address)
+        self._executor = self._client.get_executor(pure=False)
+
+    def submit(self, func, *args, **kwargs):
+        return self._executor.submit(func, *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+        self._client.close()
+        if self._cluster is not None:
+            self._cluster.close()
+
+
+def make_executor(name='serial', max_workers=None, address=None):
+    """
+    Creates the executor the pipeline tasks are fanned out to.
+
+    Parameters:
+    -----------
+    name : str
+        'serial' (in the calling thread), 'threads', 'processes' (local process
+        pool), 'dask' or 'ray'. Dask and Ray are optional dependencies; without
+        `address` they start a local cluster on this machine.
+    max_workers : int, optional
+        Number of workers of local pools and clusters.
+    address : str, optional
+        Address of an existing Dask scheduler or Ray cluster.
+
+    Returns:
+    --------
+    executor
+        Object with `concurrent.futures`-style `submit` and `shutdown` methods.
+    """
+    logger = setup_logging()
+    try:
+        if name == 'serial':
+            return SerialExecutor()
+        if name == 'threads':
+            return ThreadPoolExecutor(max_workers=max_workers)
+        if name == 'processes':
+            # Spawned workers do not inherit the driver's threads or OpenMP state
+            return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        if name == 'dask':
+            return DaskExecutor(address=address, max_workers=max_workers)
+        if name == 'ray':
+            return RayExecutor(address=address, max_workers=max_workers)
+        raise ValueError(f"Unknown executor '{name}'. Available executors: {list(EXECUTORS)}")
+
+    except ImportError as e:
+        logger.error(f"Executor '{name}' requires an optional dependency that is not installed: {e}")
+        raise
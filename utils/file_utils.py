@@ -1,29 +1,24 @@
-import os
-import glob
+from src.catalog import CleanedDataCatalog, DEFAULT_CATALOG_PATH
 
-def get_latest_cleaned_file(country):
+def get_latest_cleaned_file(country, as_of_date=None, catalog_path=DEFAULT_CATALOG_PATH):
     """
-    Returns the latest cleaned file for the specified country from the processed data folder.
+    Returns the latest cleaned file for the specified country from the cleaned data catalog.
 
     Parameters:
     -----------
     country : str
         The name of the country (e.g., 'Country 1').
+    as_of_date : str or datetime, optional
+        Return the latest snapshot created on or before this date instead.
+    catalog_path : str
+        Path of the cleaned data catalog.
 
     Returns:
     --------
     str
         Path to the latest cleaned data file.
     """
-    processed_folder = 'data/processed/'
-    search_pattern = f"{processed_folder}CleanedSales{country}_*.xlsx"
-    list_of_files = glob.glob(search_pattern)
-    
-    if not list_of_files:
-        raise FileNotFoundError(f"No cleaned data files found for {country}")
-    
-    latest_file = max(list_of_files, key=os.path.getctime)
-    return latest_file
+    return CleanedDataCatalog(catalog_path).as_of(country, as_of_date)
 
 def normalize_country_name(country_name):
     """
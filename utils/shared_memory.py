@@ -0,0 +1,119 @@
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+# Shared memory blocks published by / attached in this process, kept alive while their arrays are in use
+_PUBLISHED = {}
+_ATTACHED = {}
+
+
+class SharedArray:
+    """
+    NumPy array published once into `multiprocessing.shared_memory` so that
+    worker processes can attach to it without copying or pickling the data.
+
+    The publishing process owns the block and must call `unlink` when done;
+    workers only receive the small picklable `handle`.
+    """
+
+    def __init__(self, shm, shape, dtype):
+        self.shm = shm
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+    @classmethod
+    def publish(cls, array):
+        """
+        Copies an array into a new shared memory block.
+
+        Parameters:
+        -----------
+        array : np.ndarray
+            The array to share.
+
+        Returns:
+        --------
+        SharedArray
+            The owner of the shared block.
+        """
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = cls(shm, array.shape, array.dtype)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        _PUBLISHED[shm.name] = shm
+        return shared
+
+    @property
+    def handle(self):
+        """
+        Picklable description of the block: (name, shape, dtype string).
+        """
+        return (self.shm.name, self.shape, self.dtype.str)
+
+    @property
+    def array(self):
+        """
+        Read-only array view on the shared block.
+        """
+        view = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+        view.flags.writeable = False
+        return view
+
+    def unlink(self):
+        """
+        Releases the shared block. Arrays attached to it must no longer be used.
+        """
+        _PUBLISHED.pop(self.shm.name, None)
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # Views are still alive; the mapping is released with them
+        self.shm.unlink()
+
+
+def attach_array(handle):
+    """
+    Attaches to an array published with `SharedArray.publish` (zero-copy).
+
+    Parameters:
+    -----------
+    handle : tuple
+        The `SharedArray.handle` of the published array.
+
+    Returns:
+    --------
+    np.ndarray
+        Read-only view on the shared data.
+    """
+    name, shape, dtype = handle
+    shm = _PUBLISHED.get(name) or _ATTACHED.get(name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            # Only the publishing process may unlink the block; stop this process's
+            # resource tracker from removing it when the worker exits.
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        _ATTACHED[name] = shm
+    view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    view.flags.writeable = False
+    return view
+
+
+def detach_array(handle):
+    """
+    Closes and forgets the block attached with `attach_array`, releasing the
+    worker's mapping. Arrays attached to it must no longer be used. Blocks
+    published by this process are left to `SharedArray.unlink`.
+
+    Parameters:
+    -----------
+    handle : tuple
+        The `SharedArray.handle` of the published array.
+    """
+    shm = _ATTACHED.pop(handle[0], None)
+    if shm is not None:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # Views are still alive; the mapping is released with them